@@ -37,20 +37,15 @@ const ReviewsByRating: React.FC = () => {
 
   const { isDarkMode } = useTheme();
 
-  // 5. On component mount: fetch *all* reviews, extract unique locations
+  // 5. On component mount: fetch the (trimmed, sorted) list of locations
   useEffect(() => {
     axios
-      .get<Review[]>('http://localhost:8000/reviews')
+      .get<string[]>('http://localhost:8000/reviews/locations')
       .then((resp) => {
-        const reviews = resp.data;
-        // Extract, trim, dedupe, and sort locations
-        const uniqueLocs = Array.from(
-          new Set(reviews.map((r) => r.location.trim()))
-        ).sort((a, b) => a.localeCompare(b));
-        setAllLocations(uniqueLocs);
+        setAllLocations(resp.data);
       })
       .catch((err) => {
-        console.error('Failed to fetch all reviews for locations list:', err);
+        console.error('Failed to fetch locations list:', err);
       });
   }, []);
 
@@ -0,0 +1,40 @@
+# Description: Minimal stand-in for the remote answer service, for local testing.
+#
+#   uvicorn backend.answer_stub:app --port 7111
+#   ANSWER_SERVICE_URL=http://127.0.0.1:7111/answer uvicorn backend.app:app
+#
+# With "stream": true the answer is sent word by word as server-sent events.
+# STUB_DELAY (seconds) simulates a slow LLM; STUB_FAIL_RATE (0–1) makes that
+# fraction of requests return 503 to exercise the client's retries.
+import asyncio
+import json
+import os
+import random
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from .schemas import AnswerRequest, AnswerResponse
+
+STUB_DELAY     = float(os.getenv("STUB_DELAY", "0"))
+STUB_FAIL_RATE = float(os.getenv("STUB_FAIL_RATE", "0"))
+
+app = FastAPI()
+
+
+@app.post("/answer", response_model=AnswerResponse)
+async def answer(req: AnswerRequest):
+    if random.random() < STUB_FAIL_RATE:
+        raise HTTPException(status_code=503, detail="stub: simulated failure")
+    answer = f"[stub] {req.question} ({len(req.document)} chars of context)"
+    if req.stream:
+        return StreamingResponse(_stream_words(answer), media_type="text/event-stream")
+    await asyncio.sleep(STUB_DELAY)
+    return {"answer": answer}
+
+
+async def _stream_words(answer: str):
+    words = answer.split(" ")
+    for i, word in enumerate(words):
+        await asyncio.sleep(STUB_DELAY / len(words))
+        token = word if i == len(words) - 1 else word + " "
+        yield f"data: {json.dumps({'token': token}, ensure_ascii=False)}\n\n"
+    yield "data: [DONE]\n\n"
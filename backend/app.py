@@ -1,16 +1,18 @@
 import os
 import json
-import torch
-import requests
+import time
+import threading
 from pathlib import Path
-from fastapi import FastAPI, HTTPException, Depends, Query, Request, status
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Iterable, List, Literal, Optional
 from datetime import datetime
-from backend.core.sentiment import SentimentEnum, classify_sentiment
+from backend.core.sentiment import SentimentEnum, SENTIMENT_MODEL, classify_sentiment_batch
+from backend.core.sentiment_cache import SentimentCache, classify_with_cache
 from .database import engine, SessionLocal, Base
 from .models import User, Chat, Message
 from .schemas import (
@@ -21,16 +23,38 @@ from .schemas import (
 from .security import hash_password, verify_password
 from .auth import create_access_token, verify_token
 from .query_handle import QueryPipeline
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
 from pydantic_settings import BaseSettings
-from backend.pipeline import initialize_vector_store, generate_institution_profile
+from backend.core.providers import provider_status, warm_up
+from backend.core.answer_client import answer_client, AnswerServiceError
+from backend.core.answer_cache import answer_cache_from_env
+from backend.core.embedding_cache import query_embedding_cache_from_env
+from backend.core.embedding_batcher import embedding_batcher_from_env
+from backend.core.profile_cache import ProfileCache
+from backend.core.chunking import chunk_text
+from backend.core.corpus import iter_corpus, resolve_corpus_path
+from backend.core.incremental_index import IncrementalIndexer, IndexEntry
+from backend.core.review_store import ReviewStore
+from backend.core.static_data import static_data, etag_matches
+from backend.core.vector_store import registry
+from backend.pipeline import (
+    build_institution_profile, profile_inputs_fingerprint,
+    load_vector_db, stream_institution_profile, create_faiss_index,
+)
 # ─── locate backend folder and data/index paths ─────────────────────────────────
 BACKEND_DIR = Path(__file__).resolve().parent
-DATA_PATH   = BACKEND_DIR / "scraped_data" / "bop_website_cleaned.json"
+DATA_PATH   = BACKEND_DIR / "scraped_data" / "bop_website_cleaned.jsonl"
 INDEX_DIR   = BACKEND_DIR / "faiss_index"
 BANK_PROFILE_DATA_PATH = BACKEND_DIR / "data" / "bank_profile_data.json"
+PROFILE_CACHE_PATH = BACKEND_DIR / "data" / "institution_profile.json"
+
+# ─── chat index settings ──────────────────────────────────────────────────────
+# "passage" splits pages into overlapping chunks; "document" indexes whole pages
+INDEX_MODE           = os.getenv("CHAT_INDEX_MODE", "passage")
+CHUNK_SIZE           = int(os.getenv("CHAT_CHUNK_SIZE", "800"))      # characters
+CHUNK_OVERLAP        = int(os.getenv("CHAT_CHUNK_OVERLAP", "150"))   # characters
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKENS", "1200"))
+# FAISS index structure: flat | sq8 | ivf-flat | ivf-pq | hnsw (core/faiss_index.py)
+INDEX_TYPE           = os.getenv("CHAT_INDEX_TYPE", "flat")
 
 # Create all tables
 Base.metadata.create_all(bind=engine)
@@ -44,60 +68,109 @@ def load_json(path: str):
 
 
 def chunk_and_embed(
-    data: list[dict],
+    data: Iterable[dict],
     index_dir: str = str(INDEX_DIR),
+    mode: str = INDEX_MODE,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
 ):
     """
-    Treat each document as a single “chunk.” Index only those with lang == 'ar'.
+    Index only documents with lang == 'ar'.
+      - mode="document": treat each document as a single “chunk.”
+      - mode="passage": split each document into overlapping passages
+        (core/chunking.py); every passage keeps its page's URL plus its
+        position so retrieval can map passages back to pages.
+
+    The index is updated incrementally (core/incremental_index.py): only new
+    or changed pages are embedded and pages that disappeared are removed.
+    Changing `mode` or the chunk settings rebuilds it from scratch.
     """
-    texts = []
-    metadatas = []
+    entries = []
+    seen_urls = set()
 
     for doc in data:
         if doc.get("lang") != "ar":
             # Skip any non-Arabic documents
             continue
 
-        # Take the entire document content as one text entry
         full_content = doc.get("content", "").strip()
-        if not full_content:
+        url = doc.get("url", "")
+        if not full_content or url in seen_urls:
             continue
+        seen_urls.add(url)
 
-        texts.append(full_content)
-        metadatas.append({
-            "source": doc.get("url", ""),
-            "lang": doc.get("lang"),
-        })
-
-    # Initialize the same embedder you’ll use at query time
-    embedder = HuggingFaceEmbeddings(
-        model_name="intfloat/multilingual-e5-base",
-        model_kwargs={"device": "cuda" if torch.cuda.is_available() else "cpu"},
+        if mode == "passage":
+            passages = chunk_text(full_content, chunk_size=chunk_size, overlap=chunk_overlap)
+        else:
+            # Take the entire document content as one text entry
+            passages = [full_content]
+
+        metadatas = [
+            {
+                "source": url,
+                "lang": doc.get("lang"),
+                "chunk_index": chunk_index,
+                "n_chunks": len(passages),
+            }
+            for chunk_index in range(len(passages))
+        ]
+        entries.append(IndexEntry(url, passages, metadatas))
+
+    # The same (shared) embedder you’ll use at query time; only loaded if
+    # something actually needs embedding
+    indexer = IncrementalIndexer(
+        index_dir,
+        embedder_factory=lambda: registry.get_embedder(pipeline.embedder_model, pipeline.device),
+        index_type=INDEX_TYPE,
     )
+    # Vectors from another model or backend are not comparable, so a change rebuilds
+    settings = {"mode": mode, "model": pipeline.embedder_model, "backend": registry.backend}
+    if mode == "passage":
+        settings.update(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    indexer.update(entries, settings=settings)
 
-    # Build FAISS index from the full-document texts
-    vectorstore = FAISS.from_texts(texts, embedding=embedder, metadatas=metadatas)
+    print(f"Indexed {len(entries)} documents into FAISS at ./{index_dir}")
 
-    # Ensure the index directory exists
-    os.makedirs(index_dir, exist_ok=True)
-    vectorstore.save_local(index_dir)
 
-    print(f"Indexed {len(texts)} documents into FAISS at ./{index_dir}")
+# ─── build or refresh the FAISS index ──────────────────────────────────────────
+def ensure_index():
+    """
+    Bring the chat FAISS index in line with DATA_PATH: build it if missing,
+    embed only new/changed pages otherwise (a no-op when nothing changed).
+    """
+    data_path = resolve_corpus_path(DATA_PATH)
+    if data_path.exists():
+        # Streamed page by page; only the passages to index are kept
+        chunk_and_embed(iter_corpus(data_path), index_dir=str(INDEX_DIR))
+    elif not (INDEX_DIR / "index.faiss").exists():
+        print(f"Warning: corpus file not found at {DATA_PATH}. Skipping FAISS build.")
 
 
-# ─── build FAISS index if missing ───────────────────────────────────────────────
-if not INDEX_DIR.is_dir() or not (INDEX_DIR / "index.faiss").exists():
-    if DATA_PATH.exists():
-        print("FAISS index missing—building now…")
-        docs = load_json(str(DATA_PATH))
-        chunk_and_embed(docs, index_dir=str(INDEX_DIR))
-    else:
-        print(f"Warning: JSON file not found at {DATA_PATH}. Skipping FAISS build.")
+# ─── initialize pipeline ───────────────────────────────────────────────────────
+# The embedder and index are loaded (and the index built, if missing) on the
+# first chat request, so importing this module stays fast.
+# In passage mode, retrieval packs the best passages into CONTEXT_TOKEN_BUDGET.
+# Query embeddings are cached (QUERY_EMBED_CACHE_SIZE / QUERY_EMBED_CACHE_PATH),
+# and concurrent misses are embedded in one batch (EMBED_BATCH_SIZE / EMBED_BATCH_WAIT_MS).
+CHAT_EMBEDDING_MODEL = "intfloat/multilingual-e5-base"
+pipeline = QueryPipeline(
+    index_dir=str(INDEX_DIR),
+    embedder_model=CHAT_EMBEDDING_MODEL,
+    index_builder=ensure_index,
+    token_budget=CONTEXT_TOKEN_BUDGET if INDEX_MODE == "passage" else None,
+    embedding_cache=query_embedding_cache_from_env(CHAT_EMBEDDING_MODEL, registry.backend),
+    embedding_batcher=embedding_batcher_from_env(lambda texts: pipeline.embedder.embed_documents(texts)),
+)
 
+# Answers to repeated questions; see core/answer_cache.py for the env settings
+answer_cache = answer_cache_from_env(embed_fn=pipeline.embed_query)
 
-# ─── initialize pipeline ───────────────────────────────────────────────────────
-# (Assuming QueryPipeline is defined elsewhere to load from INDEX_DIR)
-pipeline = QueryPipeline(index_dir=str(INDEX_DIR))
+# Generated profile, regenerated only when reviews, ratings or the index change
+profile_cache = ProfileCache(
+    PROFILE_CACHE_PATH,
+    generate=build_institution_profile,
+    fingerprint=profile_inputs_fingerprint,
+)
 
 # ─── FastAPI app setup ────────────────────────────────────────────────────────
 app = FastAPI()
@@ -107,6 +180,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"],
 )
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
@@ -139,27 +213,31 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 
 
 @app.get("/data/bank_profile_data.json", summary="Get structured bank profile data")
-async def get_bank_profile_data():
+async def get_bank_profile_data(request: Request):
     """
     Endpoint to serve the structured bank profile data.
-    Returns the contents of bank_profile_data.json file.
+    Returns the contents of bank_profile_data.json file, from memory
+    (core/static_data.py); answers 304 when the client's ETag is current.
     """
     try:
-        if not os.path.exists(BANK_PROFILE_DATA_PATH):
-            return JSONResponse(
-                status_code=404,
-                content={"error": "Bank profile data file not found"}
-            )
-        
-        with open(BANK_PROFILE_DATA_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-        return data
+        entry = static_data.get(BANK_PROFILE_DATA_PATH)
     except Exception as e:
         return JSONResponse(
             status_code=500,
             content={"error": f"Failed to load bank profile data: {str(e)}"}
         )
+    if entry is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Bank profile data file not found"}
+        )
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
 @app.post("/signup", response_model=UserResponse, status_code=201)
 def signup(new_user: UserCreate, db: Session = Depends(get_db)):
     if db.query(User).filter(User.email == new_user.email).first():
@@ -241,125 +319,339 @@ def get_messages(chat_id: int, db: Session = Depends(get_db), current_user: User
     return db.query(Message).filter(Message.chat_id == chat_id).all()
 
 @app.post("/messages/", response_model=List[MessageResponse])
-def send_message(
+async def send_message(
     message: MessageInput,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    # 1) find chat & authorize
-    chat = db.query(Chat).filter(Chat.id == message.chat_id).first()
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
-    if chat.user_id != current_user.id and not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Not authorized")
-
-    # 2) persist user message
-    user_msg = Message(
-        chat_id=message.chat_id,
-        sender="user",
-        content=message.user_message,
-        timestamp=datetime.utcnow(),
-    )
-    db.add(user_msg)
+    # 1) find chat & authorize (ORM calls are blocking, so off the event loop)
+    await run_in_threadpool(_authorized_chat, db, message.chat_id, current_user)
+    asked_at = datetime.utcnow()
 
-    # 3) get actual AI answer (merge /ask logic here)
-    #    first, retrieve context via RAG
-    context = pipeline.handleQuery(message.user_message)
+    # 2) get actual AI answer (merge /ask logic here)
+    #    first, retrieve context via RAG (CPU-bound, so off the event loop)
+    context = await run_in_threadpool(pipeline.handleQuery, message.user_message)
     if not context:
         raise HTTPException(status_code=404, detail="No relevant context found")
 
-    #    then call remote answer service
-    resp = requests.post(
-        "http://176.119.254.185:7111/answer",
-        json={"question": message.user_message, "document": context},
-        timeout=100,
-    )
-    if resp.status_code != 200:
-        raise HTTPException(
-            
-            status_code=resp.status_code,
-            detail={"error": "Remote answer failed", "info": resp.text},
-        )
-    data = resp.json()
-    if "answer" not in data:
-        raise HTTPException(500, detail="Malformed response from answer service")
-
-    # 4) persist assistant message
-    bot_msg = Message(
-        chat_id=message.chat_id,
-        sender="bot",
-        content=data["answer"],
-        timestamp=datetime.utcnow(),
-    )
-    db.add(bot_msg)
+    #    repeated questions over the same context are answered from the cache
+    answer = await run_in_threadpool(answer_cache.get, message.user_message, context)
+    if answer is None:
+        #    then call remote answer service without blocking a worker thread
+        try:
+            answer = await answer_client.answer(message.user_message, context)
+        except AnswerServiceError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        await run_in_threadpool(answer_cache.put, message.user_message, context, answer)
+
+    # 3) persist both messages and return them
+    return await run_in_threadpool(_save_exchange, db, message.chat_id, message.user_message, answer, asked_at)
+
+
+# --- Streaming chat ---
+def _sse(event: str, data) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def _authorized_chat(db: Session, chat_id: int, user: User) -> Chat:
+    chat = db.query(Chat).filter(Chat.id == chat_id).first()
+    if not chat:
+        raise HTTPException(status_code=404, detail="Chat not found")
+    if chat.user_id != user.id and not user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return chat
 
+
+def _save_exchange(db: Session, chat_id: int, question: str, answer: str, asked_at: datetime) -> List[Message]:
+    """Persist a user message and the bot's answer in one commit."""
+    user_msg = Message(chat_id=chat_id, sender="user", content=question, timestamp=asked_at)
+    bot_msg = Message(chat_id=chat_id, sender="bot", content=answer, timestamp=datetime.utcnow())
+    db.add_all([user_msg, bot_msg])
     db.commit()
     db.refresh(user_msg)
     db.refresh(bot_msg)
-
-    # ) return both
     return [user_msg, bot_msg]
 
 
+def _save_message(chat_id: int, sender: str, content: str) -> dict:
+    """
+    Persist one message in its own session. Streaming responses outlive the
+    request's `get_db` session, so they can't use it for the final write.
+    """
+    db = SessionLocal()
+    try:
+        msg = Message(chat_id=chat_id, sender=sender, content=content, timestamp=datetime.utcnow())
+        db.add(msg)
+        db.commit()
+        db.refresh(msg)
+        return MessageResponse.model_validate(msg, from_attributes=True).model_dump(mode="json")
+    finally:
+        db.close()
+
+
+async def stream_chat_answer(chat_id: int, question: str):
+    """
+    Retrieve context, relay the answer service's tokens as they arrive and
+    persist the full bot message once the stream completes.
+
+    Yields ("token", {"text": ...}) events, then ("done", {"message": ...,
+    "ttft": ..., "total": ...}) or a single ("error", {...}).
+    """
+    start = time.perf_counter()
+    context = await run_in_threadpool(pipeline.handleQuery, question)
+    if not context:
+        yield "error", {"status": 404, "detail": "No relevant context found"}
+        return
+
+    parts = []
+    ttft = None
+    cached = await run_in_threadpool(answer_cache.get, question, context)
+    if cached is not None:
+        # Cache hit: the whole answer arrives as a single token
+        ttft = time.perf_counter() - start
+        parts.append(cached)
+        yield "token", {"text": cached}
+    else:
+        try:
+            async for token in answer_client.stream_answer(question, context):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                    print(f"[stream] chat {chat_id}: first token after {ttft:.2f}s")
+                parts.append(token)
+                yield "token", {"text": token}
+        except AnswerServiceError as e:
+            yield "error", {"status": e.status_code, "detail": e.detail}
+            return
+        await run_in_threadpool(answer_cache.put, question, context, "".join(parts))
+
+    bot_msg = await run_in_threadpool(_save_message, chat_id, "bot", "".join(parts))
+    total = time.perf_counter() - start
+    print(f"[stream] chat {chat_id}: done in {total:.2f}s")
+    yield "done", {"message": bot_msg, "ttft": ttft, "total": total}
+
+
+@app.post("/messages/stream", summary="Send a message and stream the answer (SSE)")
+async def send_message_stream(
+    message: MessageInput,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Like POST /messages/, but the answer comes back as server-sent events:
+    `token` events while it is generated, then `done` with the saved bot
+    message and time-to-first-token, or `error`.
+    """
+    await run_in_threadpool(_authorized_chat, db, message.chat_id, current_user)
+    # Save the user's message before streaming so it survives a dropped connection
+    await run_in_threadpool(_save_message, message.chat_id, "user", message.user_message)
+
+    async def events():
+        async for event, data in stream_chat_answer(message.chat_id, message.user_message):
+            yield _sse(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _load_user(user_id: int) -> Optional[User]:
+    db = SessionLocal()
+    try:
+        return db.query(User).get(user_id)
+    finally:
+        db.close()
+
+
+def _check_chat_access(chat_id: int, user: User) -> None:
+    """_authorized_chat in its own session, for callers without a request one."""
+    db = SessionLocal()
+    try:
+        _authorized_chat(db, chat_id, user)
+    finally:
+        db.close()
+
+
+@app.websocket("/ws/messages")
+async def websocket_messages(websocket: WebSocket, token: str = Query(...)):
+    """
+    WebSocket chat: send {"chat_id": ..., "user_message": ...} and receive the
+    answer as text frames followed by "[END]" (same protocol as the
+    Frontend/testbackend prototype). Errors arrive as "[ERROR] ..." then "[END]".
+    Authenticate with ?token=<access token>.
+    """
+    payload = verify_token(token)
+    if payload is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    user = await run_in_threadpool(_load_user, int(payload.get("sub")))
+    if not user:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                message = MessageInput(**await websocket.receive_json())
+            except (ValueError, TypeError) as e:
+                await websocket.send_text(f"[ERROR] Invalid message: {e}")
+                await websocket.send_text("[END]")
+                continue
+
+            try:
+                await run_in_threadpool(_check_chat_access, message.chat_id, user)
+            except HTTPException as e:
+                await websocket.send_text(f"[ERROR] {e.detail}")
+                await websocket.send_text("[END]")
+                continue
+
+            await run_in_threadpool(_save_message, message.chat_id, "user", message.user_message)
+            async for event, data in stream_chat_answer(message.chat_id, message.user_message):
+                if event == "token":
+                    await websocket.send_text(data["text"])
+                elif event == "error":
+                    await websocket.send_text(f"[ERROR] {data['detail']}")
+            await websocket.send_text("[END]")
+    except WebSocketDisconnect:
+        print("[ws] client disconnected")
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Close pooled connections to the answer service and stop the embedding worker."""
+    await answer_client.aclose()
+    if pipeline.embedding_batcher is not None:
+        await run_in_threadpool(pipeline.embedding_batcher.close)
+
+
 class Settings(BaseSettings):
     DATA_FILE: str = "core/data/bank_reviews.json"
 
 settings = Settings()
 
 
-# Global in-memory list of reviews
-REVIEWS: List[ReviewOut] = []
+# Global in-memory reviews, indexed for filtering (core/review_store.py), with
+# aggregates over them updated by diff on every (re)load (core/review_stats.py)
+review_store = ReviewStore()
+
+
+REVIEWS_DATA_PATH = BACKEND_DIR / "core" / "data" / "bank_reviews.json"
+# Seconds between checks of the reviews file for changes (0 disables the watcher)
+REVIEWS_WATCH_INTERVAL = float(os.getenv("REVIEWS_WATCH_INTERVAL", "5"))
+
+# One reload at a time (startup, admin endpoint or file watcher)
+_reviews_reload_lock = threading.Lock()
 
 
-def load_and_classify_reviews():
+def _file_signature(path: Path):
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def load_and_classify_reviews() -> dict:
     """
     1. Load the JSON file from disk
-    2. For each review (ReviewIn), compute sentiment
+    2. Diff it against the reviews currently served: unchanged reviews keep
+       their sentiment, only new or edited ones are classified (in batches,
+       reusing cached labels for texts seen before)
     3. Build a ReviewOut with an 'id' and 'sentiment'
-    4. Append to the global REVIEWS list
+    4. Index them, update the aggregates and swap both into the global
+       review store in one step, so requests keep being served from the old
+       list and stats until then
+    Returns counts of what changed.
     """
-    global REVIEWS
-    REVIEWS.clear()
-
-     # 1) Determine the directory where this file (app.py) resides:
-    base_dir = Path(__file__).resolve().parent  
-    #    If __file__ is ".../nlp_project/backend/app.py", then base_dir == ".../nlp_project/backend"
-
-    # 2) Build the absolute path to "core/data/bank_reviews.json":
-    data_path = base_dir / "core" / "data" / "bank_reviews.json"
-
+    data_path = REVIEWS_DATA_PATH
     if not data_path.exists():
         raise FileNotFoundError(f"Cannot find data file at {data_path}")
 
-    with open(data_path, "r", encoding="utf-8") as f:
-        raw_list = json.load(f)  # a list of dicts matching ReviewIn
+    with _reviews_reload_lock:
+        with open(data_path, "r", encoding="utf-8") as f:
+            raw_list = json.load(f)  # a list of dicts matching ReviewIn
+
+        parsed = []
+        for idx, entry in enumerate(raw_list):
+            try:
+                parsed.append((idx, ReviewIn(**entry)))
+            except Exception as e:
+                # Skip invalid entries (or you could log them)
+                continue
+
+        reviews: List[Optional[ReviewOut]] = []
+        to_classify = []
+        for idx, r in parsed:
+            current = review_store.get(idx)
+            if current is not None and current.review == r.review:
+                # Same text: keep its sentiment (and the object itself if nothing changed)
+                review_out = ReviewOut(id=idx, **r.model_dump(), sentiment=current.sentiment)
+                reviews.append(current if review_out == current else review_out)
+            else:
+                reviews.append(None)
+                to_classify.append(len(reviews) - 1)
+
+        if to_classify:
+            # Reuse labels from the on-disk cache; only unseen texts hit the model
+            cache = SentimentCache(data_path.parent / "sentiment_cache.sqlite3")
+            try:
+                labels = classify_with_cache(
+                    [parsed[i][1].review for i in to_classify], cache, SENTIMENT_MODEL, classify_sentiment_batch
+                )
+            finally:
+                cache.close()
+            for i, sentiment_label in zip(to_classify, labels):
+                idx, r = parsed[i]
+                reviews[i] = ReviewOut(id=idx, **r.model_dump(), sentiment=sentiment_label.value)
+
+        changes = review_store.replace(reviews)
+        changes["classified"] = len(to_classify)
+        changes["total"] = len(reviews)
+
+    # print number of positive, neutral, negative reviews
+    sentiment_counts = review_store.stats.summary()["sentiment"]
+    positive_count = sentiment_counts.get(SentimentEnum.POSITIVE.value, 0)
+    neutral_count = sentiment_counts.get(SentimentEnum.NEUTRAL.value, 0)
+    negative_count = sentiment_counts.get(SentimentEnum.NEGATIVE.value, 0)
+    print("/////////////////////////////////////////////")
+    print(f"Loaded {len(reviews)} reviews: {positive_count} positive, {neutral_count} neutral, {negative_count} negative.")
+    print(f"Reviews reload: {changes}")
+    return changes
+
 
-    for idx, entry in enumerate(raw_list):
+def watch_reviews_file(interval: float = REVIEWS_WATCH_INTERVAL):
+    """
+    Poll the reviews file and reload it when its mtime or size changes.
+    A file that fails to load (e.g. caught half-written) is retried on its
+    next change; the previous reviews stay in service meanwhile.
+    """
+    try:
+        last_seen = _file_signature(REVIEWS_DATA_PATH)
+    except OSError:
+        last_seen = None
+    while True:
+        time.sleep(interval)
         try:
-            r = ReviewIn(**entry)
-        except Exception as e:
-            # Skip invalid entries (or you could log them)
+            signature = _file_signature(REVIEWS_DATA_PATH)
+        except OSError:
             continue
+        if signature == last_seen:
+            continue
+        last_seen = signature
+        try:
+            load_and_classify_reviews()
+        except Exception as e:
+            print(f"[reviews] Reload failed, keeping the current reviews: {e}")
 
-        sentiment_label = classify_sentiment(r.review)
-        review_out = ReviewOut(
-            id=idx,
-            reviewer=r.reviewer,
-            stars=r.stars,
-            since=r.since,
-            review=r.review,
-            location=r.location,
-            source=r.source,
-            sentiment=sentiment_label.value
-        )
-        REVIEWS.append(review_out)
-    # print number of positive, neutral, negative reviews
-    positive_count = sum(1 for r in REVIEWS if r.sentiment == SentimentEnum.POSITIVE.value)
-    neutral_count = sum(1 for r in REVIEWS if r.sentiment == SentimentEnum.NEUTRAL.value)
-    negative_count = sum(1 for r in REVIEWS if r.sentiment == SentimentEnum.NEGATIVE.value)
-    print("/////////////////////////////////////////////")
-    print(f"Loaded {len(REVIEWS)} reviews: {positive_count} positive, {neutral_count} neutral, {negative_count} negative.")
-        
+
+def warm_up_models():
+    """Load every model and index ahead of the first request that needs them."""
+    warm_up(background=False)
+    for name, load in (("chat index", lambda: pipeline.vectorstore), ("profile index", load_vector_db)):
+        try:
+            load()
+        except Exception as e:
+            print(f"[warm-up] Could not load {name}: {e}")
 
 
 @app.on_event("startup")
@@ -368,28 +660,77 @@ async def on_startup():
     When the app starts, load & classify all reviews.
     """
     load_and_classify_reviews()
+    if REVIEWS_WATCH_INTERVAL > 0:
+        threading.Thread(target=watch_reviews_file, name="reviews-watcher", daemon=True).start()
 
     """
-    Initialize or recreate the FAISS index on startup if needed.
+    Models and FAISS indexes load lazily on first use. Set WARMUP_MODELS=1 to
+    load them in a background thread instead, without delaying startup.
     """
+    if os.getenv("WARMUP_MODELS", "0").lower() in ("1", "true", "yes"):
+        threading.Thread(target=warm_up_models, name="model-warmup", daemon=True).start()
+        print("[startup] Warming up models in the background.")
+
+
+@app.post("/admin/reindex", summary="Update FAISS indexes from the scraped corpus")
+def reindex(current_user: User = Depends(get_current_user)):
+    """
+    Embed only pages that are new or changed since the last build (e.g. after
+    a re-scrape). Running queries switch to the new indexes once they are saved.
+    """
+    if not current_user.is_admin: raise HTTPException(status_code=403, detail="Not authorized")
+    ensure_index()
+    create_faiss_index()
+    return {"status": "ok"}
+
+
+@app.post("/admin/reviews/reload", summary="Reload reviews from bank_reviews.json")
+def reload_reviews(current_user: User = Depends(get_current_user)):
+    """
+    Pick up edits to the reviews file without restarting the server. Only
+    new or changed reviews are classified; requests keep being served from
+    the previous reviews until the new ones are swapped in.
+    """
+    if not current_user.is_admin: raise HTTPException(status_code=403, detail="Not authorized")
     try:
-        created = initialize_vector_store()
-        if created:
-            print("[startup] Created new FAISS index.")
-        else:
-            print("[startup] FAISS index already exists.")
-    except Exception as e:
-        print(f"[startup] Error initializing vector store: {e}")
+        return load_and_classify_reviews()
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not reload reviews: {e}")
+
+
+@app.get("/cache/stats", summary="Cache hit-rate metrics")
+def cache_stats(current_user: User = Depends(get_current_user)):
+    if not current_user.is_admin: raise HTTPException(status_code=403, detail="Not authorized")
+    stats = {"answers": answer_cache.stats()}
+    if pipeline.embedding_cache is not None:
+        stats["query_embeddings"] = pipeline.embedding_cache.stats()
+    if pipeline.embedding_batcher is not None:
+        stats["embedding_batches"] = pipeline.embedding_batcher.stats()
+    return stats
+
+
+@app.get("/health", summary="Liveness check")
+def health():
+    """
+    Cheap liveness check that never loads a model.
+    Also reports which lazily loaded models are ready.
+    """
+    return {"status": "ok", "reviews": len(review_store), "models": provider_status()}
 
 
 @app.get("/reviews", response_model=List[ReviewOut])
 def get_reviews(
+    response: Response,
     stars: Optional[int] = Query(None, ge=1, le=5),
     sentiment: Optional[SentimentEnum] = Query(None),
     reviewer: Optional[str] = Query(None),
     location: Optional[str] = Query(None),
     source: Optional[str] = Query(None),
     since: Optional[int] = Query(None, ge=0),
+    sort: Literal["id", "stars", "sentiment", "location", "source", "reviewer", "since"] = Query("id"),
+    order: Literal["asc", "desc"] = Query("asc"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
 ):
     """
     Return all reviews, optionally filtered by:
@@ -399,28 +740,50 @@ def get_reviews(
       - location (exact string match)
       - source (exact string match)
       - since (exact integer match)
+    sorted by `sort` (`order` asc | desc) and paginated with `offset`/`limit`
+    (no limit returns every match). The number of matches before pagination
+    is returned in the X-Total-Count header.
     """
-    results = REVIEWS
-
-    if stars is not None:
-        results = [r for r in results if r.stars == stars]
+    total, results = review_store.query(
+        {
+            "stars": stars,
+            "sentiment": sentiment.value if sentiment is not None else None,
+            "reviewer": reviewer,
+            # Stored locations are stripped (schemas.ReviewIn)
+            "location": location.strip() if location is not None else None,
+            "source": source,
+            "since": since,
+        },
+        sort=sort,
+        descending=order == "desc",
+        offset=offset,
+        limit=limit,
+    )
+    response.headers["X-Total-Count"] = str(total)
+    return results
 
-    if sentiment is not None:
-        results = [r for r in results if r.sentiment == sentiment.value]
 
-    if reviewer is not None:
-        results = [r for r in results if r.reviewer == reviewer]
+@app.get("/reviews/stats", summary="Review aggregates overall and per location")
+def get_review_stats():
+    """
+    Star histogram, average rating, sentiment distribution and source counts,
+    overall and for every location, in one response. Precomputed; kept up to
+    date whenever reviews are reloaded.
+    """
+    return review_store.stats.summary()
 
-    if location is not None:
-        results = [r for r in results if r.location == location]
 
-    if source is not None:
-        results = [r for r in results if r.source == source]
+@app.get("/reviews/locations", response_model=List[str], summary="Distinct review locations")
+def get_review_locations():
+    return review_store.stats.locations()
 
-    if since is not None:
-        results = [r for r in results if r.since == since]
 
-    return results
+@app.get("/reviews/stats/{location}", summary="Review aggregates for one location")
+def get_location_stats(location: str):
+    stats = review_store.stats.location(location.strip())
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    return stats
 
 
 @app.get("/reviews/{review_id}", response_model=ReviewOut)
@@ -429,19 +792,68 @@ def get_review_by_id(review_id: int):
     """
     Return a single review by its numeric index (`id`).
     """
-    if review_id < 0 or review_id >= len(REVIEWS):
+    review = review_store.get(review_id)
+    if review is None:
         raise HTTPException(status_code=404, detail="Review not found")
-    return REVIEWS[review_id]
+    return review
 
 
 @app.get("/institution-profile", summary="Generate BOP institution profile")
 async def get_institution_profile():
     """
-    Endpoint to generate and return the Bank of Palestine institution profile.
+    Endpoint to return the Bank of Palestine institution profile.
+    Served from the profile cache; when its inputs have changed the previous
+    profile is returned (`stale: true`) while a new one is generated in the
+    background.
     """
     try:
-        profile_text = generate_institution_profile()
-        return {"profile": profile_text}
+        return await run_in_threadpool(profile_cache.get)
     except Exception as e:
         # Return a 500 error if something goes wrong
-        raise HTTPException(status_code=500, detail=f"Profile generation failed: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Profile generation failed: {e}")
+
+
+@app.post("/institution-profile/refresh", status_code=202, summary="Regenerate the institution profile")
+def refresh_institution_profile(current_user: User = Depends(get_current_user)):
+    if not current_user.is_admin: raise HTTPException(status_code=403, detail="Not authorized")
+    profile_cache.refresh(background=True)
+    return {"status": "regenerating"}
+
+
+@app.get("/institution-profile/stream", summary="Stream the BOP institution profile (SSE)")
+async def stream_institution_profile_endpoint():
+    """
+    Stream the institution profile as server-sent events while the LLM writes
+    it: `token` events, then `done` with time-to-first-token, or `error`.
+    An up-to-date cached profile arrives as a single token; a generated one
+    is stored in the profile cache once complete.
+    """
+    async def events():
+        start = time.perf_counter()
+        cached = await run_in_threadpool(profile_cache.fresh)
+        if cached is not None:
+            yield _sse("token", {"text": cached["profile"]})
+            yield _sse("done", {"ttft": time.perf_counter() - start, "total": time.perf_counter() - start,
+                                "cached": True})
+            return
+
+        ttft = None
+        parts = []
+        try:
+            async for chunk in stream_institution_profile():
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                    print(f"[stream] profile: first token after {ttft:.2f}s")
+                parts.append(chunk)
+                yield _sse("token", {"text": chunk})
+        except Exception as e:
+            yield _sse("error", {"status": 500, "detail": f"Profile generation failed: {e}"})
+            return
+        await run_in_threadpool(profile_cache.store, "".join(parts))
+        yield _sse("done", {"ttft": ttft, "total": time.perf_counter() - start, "cached": False})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
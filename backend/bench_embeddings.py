@@ -0,0 +1,160 @@
+# Description: Parity check and benchmark of the embedding backends (torch vs ONNX Runtime fp32/int8).
+#
+#   python -m backend.bench_embeddings [--model intfloat/multilingual-e5-base] [--passages 200]
+#
+# Each backend runs in its own process so resident memory is measured in
+# isolation. Reports load time, memory, single-query latency and batch
+# throughput, then compares every ONNX backend with torch: cosine similarity
+# of the vectors and overlap of the top-5 passages retrieved per query. A few
+# whole pages are included as passages too, since pipeline.create_faiss_index
+# embeds pages unchunked and those run into each model's truncation limit.
+# Exits non-zero if a backend drifts below the parity thresholds.
+import argparse
+import multiprocessing as mp
+import os
+import statistics
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.core.chunking import chunk_text, split_sentences
+from backend.core.corpus import iter_corpus, resolve_corpus_path
+
+DATA_PATH = Path(__file__).resolve().parent / "scraped_data" / "bop_website_cleaned.jsonl"
+
+SAMPLE_TEXTS = [
+    "ما هي رسوم فتح حساب جاري في بنك فلسطين؟",
+    "كيف يمكنني تفعيل تطبيق بنكي على الهاتف المحمول؟",
+    "أين يقع فرع رام الله الرئيسي وما هي ساعات الدوام؟",
+    "ما هي نسبة الفائدة على القروض الشخصية؟",
+    "تأسس بنك فلسطين في عام 1960 في مدينة غزة.",
+    "خدمة الحوالات الدولية عبر سويفت متاحة لجميع العملاء.",
+    "What are the fees for an international transfer?",
+    "Bank of Palestine won the Best Bank in Financial Inclusion award.",
+]
+
+# Whole pages added to the passages
+LONG_PAGES = 8
+
+# Minimum cosine similarity to the torch vectors
+MIN_COSINE = {"onnx": 0.999, "onnx-int8": 0.95}
+
+
+def _rss_mb() -> float:
+    """Current resident memory of this process in MB (Linux), else peak RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _load_texts(limit: int):
+    path = resolve_corpus_path(DATA_PATH)
+    passages, pages = [], []
+    if path.exists():
+        for doc in iter_corpus(path):
+            if doc.get("lang") == "ar":
+                passages.extend(chunk_text(doc.get("content", "")))
+                pages.append(doc.get("content", ""))
+            if len(passages) >= limit:
+                break
+    if not passages:
+        passages = SAMPLE_TEXTS * max(1, limit // len(SAMPLE_TEXTS))
+        pages = [" ".join(SAMPLE_TEXTS * 40)]
+    pages = sorted(pages, key=len, reverse=True)[:LONG_PAGES]
+    passages = passages[:limit] + pages
+    # Use the first sentence of every few passages as a query
+    queries = [split_sentences(p)[0] for p in passages[::4] if split_sentences(p)]
+    return passages, queries
+
+
+def _run_backend(backend: str, model: str, passages, queries, result_queue):
+    """Child process: load one backend, time it and send back its vectors."""
+    from backend.core.vector_store import VectorStoreRegistry
+
+    base_rss = _rss_mb()
+    start = time.perf_counter()
+    embedder = VectorStoreRegistry(backend=backend).get_embedder(model, "cpu" if backend == "torch" else None)
+    embedder.embed_query("warm up")
+    load_time = time.perf_counter() - start
+
+    latencies, query_vectors = [], []
+    for q in queries:
+        t = time.perf_counter()
+        query_vectors.append(embedder.embed_query(q))
+        latencies.append(time.perf_counter() - t)
+
+    t = time.perf_counter()
+    passage_vectors = embedder.embed_documents(passages)
+    batch_time = time.perf_counter() - t
+
+    latencies.sort()
+    result_queue.put({
+        "backend": backend,
+        "load_s": load_time,
+        "rss_mb": _rss_mb() - base_rss,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "docs_per_s": len(passages) / batch_time,
+        "queries": np.asarray(query_vectors, dtype=np.float32),
+        "passages": np.asarray(passage_vectors, dtype=np.float32),
+    })
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    return x / np.clip(np.linalg.norm(x, axis=1, keepdims=True), 1e-12, None)
+
+
+def _top_k(queries: np.ndarray, passages: np.ndarray, k: int = 5) -> np.ndarray:
+    return np.argsort(-(_normalize(queries) @ _normalize(passages).T), axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding backends")
+    parser.add_argument("--model", default="intfloat/multilingual-e5-base")
+    parser.add_argument("--passages", type=int, default=200)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    args = parser.parse_args()
+
+    passages, queries = _load_texts(args.passages)
+    print(f"{args.model}: {len(passages)} passages, {len(queries)} queries\n")
+
+    ctx = mp.get_context("spawn")
+    results = {}
+    for backend in args.backends.split(","):
+        result_queue = ctx.Queue()
+        proc = ctx.Process(target=_run_backend, args=(backend, args.model, passages, queries, result_queue))
+        proc.start()
+        results[backend] = result_queue.get()
+        proc.join()
+
+    print(f"{'backend':<12}{'load':>8}{'RSS':>10}{'p50':>10}{'p95':>10}{'docs/s':>10}")
+    for name, r in results.items():
+        print(f"{name:<12}{r['load_s']:>7.1f}s{r['rss_mb']:>8.0f}MB{r['p50_ms']:>8.1f}ms"
+              f"{r['p95_ms']:>8.1f}ms{r['docs_per_s']:>10.1f}")
+
+    reference = results.get("torch")
+    if reference is None:
+        return
+    failed = False
+    print(f"\n{'parity vs torch':<16}{'min cos':>10}{'mean cos':>10}{'top-5 overlap':>15}")
+    ref_top = _top_k(reference["queries"], reference["passages"])
+    for name, r in results.items():
+        if name == "torch":
+            continue
+        cos = (_normalize(reference["passages"]) * _normalize(r["passages"])).sum(axis=1)
+        top = _top_k(r["queries"], r["passages"])
+        overlap = np.mean([len(set(a) & set(b)) / len(a) for a, b in zip(ref_top, top)])
+        ok = cos.min() >= MIN_COSINE.get(name, 0.95)
+        failed |= not ok
+        print(f"{name:<16}{cos.min():>10.4f}{cos.mean():>10.4f}{overlap:>15.2%}  {'ok' if ok else 'BELOW THRESHOLD'}")
+
+    if failed:
+        raise SystemExit("An ONNX backend does not match the torch embeddings closely enough")
+
+
+if __name__ == "__main__":
+    main()
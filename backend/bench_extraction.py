@@ -0,0 +1,76 @@
+# Description: Benchmark the extraction engine against the reference extractors in test.py.
+#
+#   python bench_extraction.py [--repeat 5] [--scale 1]
+#
+# Runs both implementations over the scraped corpus (repeated `--scale` times
+# to simulate a larger crawl), prints per-function timings and checks that the
+# outputs are identical, then compares extract_profile() on one process with
+# the process pool.
+import argparse
+import time
+
+import extraction_engine as engine
+import test as reference
+
+
+def _same(name, expected, actual):
+    # The reference fees/rates come out of a set(), so only their contents are comparable
+    if name == "extract_fees_and_rates":
+        return all(set(expected[k]) == set(actual[k]) and len(expected[k]) == len(actual[k]) for k in expected)
+    return expected == actual
+
+
+def _time(fn, arg, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the extraction engine against test.py")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per function (best is reported)")
+    parser.add_argument("--scale", type=int, default=1, help="replicate the corpus this many times")
+    parser.add_argument("--workers", type=int, default=reference.EXTRACTION_WORKERS, help="processes for extract_profile")
+    args = parser.parse_args()
+
+    raw_data = reference.load_raw_data() * args.scale
+    if not raw_data:
+        print("No corpus found; run scrape_bop.py first.")
+        return
+    texts = [entry.get("content", "") for entry in raw_data]
+    print(f"{len(raw_data)} pages, {sum(map(len, texts)):,} characters\n")
+
+    cases = [
+        ("extract_branch_locations", raw_data),
+        ("extract_bank_services", raw_data),
+        ("extract_fees_and_rates", raw_data),
+        ("extract_digital_features", raw_data),
+        ("extract_known_entities", texts),
+    ]
+    print(f"{'function':<28}{'reference':>12}{'engine':>12}{'speedup':>10}  output")
+    all_same = True
+    for name, arg in cases:
+        ref_time, expected = _time(getattr(reference, name), arg, args.repeat)
+        eng_time, actual = _time(getattr(engine, name), arg, args.repeat)
+        same = _same(name, expected, actual)
+        all_same &= same
+        print(f"{name:<28}{ref_time * 1000:>10.1f}ms{eng_time * 1000:>10.1f}ms"
+              f"{ref_time / max(eng_time, 1e-9):>9.1f}x  {'identical' if same else 'DIFFERENT'}")
+
+    serial_time, serial = _time(lambda t: engine.extract_profile(t, workers=1), texts, args.repeat)
+    pool_time, pooled = _time(lambda t: engine.extract_profile(t, workers=args.workers), texts, args.repeat)
+    same = serial == pooled
+    all_same &= same
+    print(f"\nextract_profile: 1 process {serial_time * 1000:.1f}ms, {args.workers} processes "
+          f"{pool_time * 1000:.1f}ms ({serial_time / max(pool_time, 1e-9):.1f}x), "
+          f"output {'identical' if same else 'DIFFERENT'}")
+
+    if not all_same:
+        raise SystemExit("Engine output differs from the reference implementation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# Description: Recall-vs-latency benchmark of the FAISS index types against the flat baseline.
+#
+#   python -m backend.bench_faiss_index [--vectors 50000] [--dim 768]
+#   python -m backend.bench_faiss_index --from-index backend/faiss_index
+#
+# Uses the vectors of an existing (flat) index, or synthetic clustered
+# vectors, builds every index type from core/faiss_index.py on them and
+# reports, for a range of nprobe / efSearch values, recall@k against exact
+# search, mean query latency and index size.
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from backend.core.faiss_index import INDEX_TYPES, factory_string
+
+NPROBE_VALUES = (1, 4, 8, 16, 64)
+EF_SEARCH_VALUES = (16, 32, 64, 128, 256)
+
+
+def _synthetic(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, closer to sentence embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 100), dim)).astype(np.float32)
+    x = centers[rng.integers(0, len(centers), n)] + 0.3 * rng.standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def _from_index(index_dir: str) -> np.ndarray:
+    index = faiss.read_index(f"{index_dir}/index.faiss")
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def _search(index, queries: np.ndarray, k: int):
+    start = time.perf_counter()
+    _, ids = index.search(queries, k)
+    return ids, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def _recall(truth: np.ndarray, found: np.ndarray) -> float:
+    return float(np.mean([len(set(t) & set(f)) / len(t) for t, f in zip(truth, found)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FAISS index types")
+    parser.add_argument("--from-index", help="directory of an existing FAISS index to take vectors from")
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.from_index:
+        data = np.ascontiguousarray(_from_index(args.from_index), dtype=np.float32)
+        # Queries are perturbed copies of indexed vectors
+        rng = np.random.default_rng(1)
+        picked = rng.choice(len(data), size=min(args.queries, max(1, len(data) // 10)), replace=False)
+        queries = data[picked] + 0.05 * rng.standard_normal((len(picked), data.shape[1])).astype(np.float32)
+    else:
+        data = _synthetic(args.vectors + args.queries, args.dim)
+        queries, data = data[-args.queries:], data[:-args.queries]
+    queries, data = np.ascontiguousarray(queries), np.ascontiguousarray(data)
+    dim = data.shape[1]
+    print(f"{len(data)} vectors × {dim} dims, {len(queries)} queries, recall@{args.k}\n")
+
+    flat = faiss.IndexFlatL2(dim)
+    flat.add(data)
+    truth, flat_ms = _search(flat, queries, args.k)
+
+    print(f"{'index':<24}{'param':>14}{'recall':>9}{'ms/query':>10}{'size MB':>10}{'build s':>9}")
+    print(f"{'flat':<24}{'-':>14}{1.0:>9.3f}{flat_ms:>10.3f}{flat.ntotal * dim * 4 / 2**20:>10.1f}{0:>9.1f}")
+
+    for index_type in INDEX_TYPES:
+        spec = factory_string(index_type, dim, len(data))
+        if spec is None:
+            continue
+        start = time.perf_counter()
+        index = faiss.index_factory(dim, spec)
+        if not index.is_trained:
+            index.train(data)
+        index.add(data)
+        build_s = time.perf_counter() - start
+        size_mb = faiss.serialize_index(index).nbytes / 2**20
+
+        ivf = faiss.try_extract_index_ivf(index)
+        if ivf is not None:
+            settings = [("nprobe", v) for v in NPROBE_VALUES if v <= ivf.nlist]
+        elif hasattr(index, "hnsw"):
+            settings = [("efSearch", v) for v in EF_SEARCH_VALUES]
+        else:
+            settings = [(None, None)]
+
+        for name, value in settings:
+            if name == "nprobe":
+                ivf.nprobe = value
+            elif name == "efSearch":
+                index.hnsw.efSearch = max(value, args.k)
+            found, ms = _search(index, queries, args.k)
+            param = f"{name}={value}" if name else "-"
+            print(f"{f'{index_type} ({spec})':<24}{param:>14}{_recall(truth, found):>9.3f}"
+                  f"{ms:>10.3f}{size_mb:>10.1f}{build_s:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# backend/core/answer_cache.py
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.core.arabic import normalize_arabic
+
+
+def context_fingerprint(context: str) -> str:
+    """Short hash of the retrieved context an answer was generated from."""
+    return hashlib.sha256(context.encode("utf-8")).hexdigest()[:16]
+
+
+class _CachedAnswer:
+    __slots__ = ("answer", "expires_at", "vector")
+
+    def __init__(self, answer: str, expires_at: float, vector: Optional[np.ndarray]):
+        self.answer = answer
+        self.expires_at = expires_at
+        self.vector = vector
+
+
+class AnswerCache:
+    """
+    In-memory LRU cache of chat answers with a TTL.
+
+    Entries are keyed by (normalized question, context fingerprint), so the
+    same question answered from different retrieved documents is a different
+    entry. With `embed_fn` set, a question that misses the exact key can still
+    hit an entry for the same context whose question embedding has cosine
+    similarity ≥ `similarity_threshold` ("near-duplicate" questions).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 3600.0,
+        embed_fn: Optional[Callable[[str], Sequence[float]]] = None,
+        similarity_threshold: float = 0.95,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[Tuple[str, str], _CachedAnswer]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Question vectors computed by a missed get(), reused by the following put()
+        self._pending_vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ─── lookup ───────────────────────────────────────────────────────────────
+    def get(self, question: str, context: str) -> Optional[str]:
+        """Return a cached answer for `question` given `context`, or None."""
+        key = (normalize_arabic(question), context_fingerprint(context))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._lookup(key, now)
+            if entry is not None:
+                self.hits += 1
+                return entry.answer
+            if self.embed_fn is None:
+                self.misses += 1
+                return None
+
+        # Embedding runs the model, so do it outside the lock
+        vector = self._embed(key[0])
+
+        with self._lock:
+            match = self._nearest(key[1], vector, now)
+            if match is not None:
+                self._entries.move_to_end(match)
+                self.hits += 1
+                self.semantic_hits += 1
+                return self._entries[match].answer
+            self.misses += 1
+            self._pending_vectors[key[0]] = vector
+            if len(self._pending_vectors) > 256:
+                self._pending_vectors.popitem(last=False)
+            return None
+
+    def put(self, question: str, context: str, answer: str) -> None:
+        key = (normalize_arabic(question), context_fingerprint(context))
+        vector = None
+        if self.embed_fn is not None:
+            with self._lock:
+                vector = self._pending_vectors.pop(key[0], None)
+            if vector is None:
+                vector = self._embed(key[0])
+        with self._lock:
+            self._entries[key] = _CachedAnswer(answer, time.monotonic() + self.ttl, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # ─── metrics ──────────────────────────────────────────────────────────────
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    # ─── internals (call with the lock held unless noted) ────────────────────
+    def _lookup(self, key, now: float) -> Optional[_CachedAnswer]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _nearest(self, fingerprint: str, vector: np.ndarray, now: float):
+        best_key, best_score = None, self.similarity_threshold
+        expired: List[Tuple[str, str]] = []
+        for key, entry in self._entries.items():
+            if entry.expires_at <= now:
+                expired.append(key)
+                continue
+            if key[1] != fingerprint or entry.vector is None:
+                continue
+            score = float(np.dot(vector, entry.vector))
+            if score >= best_score:
+                best_key, best_score = key, score
+        for key in expired:
+            del self._entries[key]
+        return best_key
+
+    def _embed(self, text: str) -> np.ndarray:
+        # Not under the lock: this may run a model forward pass
+        vector = np.asarray(self.embed_fn(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def answer_cache_from_env(embed_fn: Optional[Callable[[str], Sequence[float]]] = None) -> AnswerCache:
+    """
+    Build an AnswerCache configured by environment variables:
+      ANSWER_CACHE_SIZE (1024), ANSWER_CACHE_TTL seconds (3600),
+      ANSWER_CACHE_SEMANTIC=1 to enable near-duplicate matching with `embed_fn`,
+      ANSWER_CACHE_SIMILARITY (0.95).
+    """
+    semantic = os.getenv("ANSWER_CACHE_SEMANTIC", "0").lower() in ("1", "true", "yes")
+    return AnswerCache(
+        max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+        embed_fn=embed_fn if semantic else None,
+        similarity_threshold=float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95")),
+    )
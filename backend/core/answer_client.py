@@ -0,0 +1,200 @@
+# backend/core/answer_client.py
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from typing import AsyncIterator, Optional
+
+import httpx
+
+logger = logging.getLogger("AnswerClient")
+
+# Point this at a local stub (see answer_stub.py) to test without the real service
+ANSWER_SERVICE_URL = os.getenv("ANSWER_SERVICE_URL", "http://176.119.254.185:7111/answer")
+
+# Statuses worth retrying: the service is overloaded or restarting
+_RETRYABLE_STATUS = {502, 503, 504}
+
+
+class AnswerServiceError(Exception):
+    """The answer service failed; carries the HTTP status to return to the caller."""
+
+    def __init__(self, status_code: int, detail):
+        super().__init__(str(detail))
+        self.status_code = status_code
+        self.detail = detail
+
+
+class AnswerClient:
+    """
+    Async client for the remote answer service.
+
+      - One pooled httpx.AsyncClient is shared by all requests (keep-alive).
+      - At most `max_concurrency` calls are in flight; the rest wait their turn.
+      - Each call has an overall `deadline` in seconds, covering waiting for a
+        slot, every attempt and the backoff sleeps in between.
+      - Connection errors, timeouts and 502/503/504 are retried with
+        exponential backoff and jitter.
+    """
+
+    def __init__(
+        self,
+        url: str = ANSWER_SERVICE_URL,
+        max_concurrency: int = int(os.getenv("ANSWER_MAX_CONCURRENCY", "16")),
+        deadline: float = float(os.getenv("ANSWER_DEADLINE", "100")),
+        max_retries: int = 2,
+        backoff: float = 0.5,
+    ):
+        self.url = url
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created on first use so it binds to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=30.0,
+                ),
+                timeout=httpx.Timeout(self.deadline, connect=5.0),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def answer(self, question: str, document: str, deadline: Optional[float] = None) -> str:
+        """Ask the service to answer `question` from `document` and return the answer text."""
+        client = self._get_client()
+        budget = deadline if deadline is not None else self.deadline
+        expires = time.monotonic() + budget
+        payload = {"question": question, "document": document}
+
+        try:
+            return await asyncio.wait_for(self._call(client, payload, expires), timeout=budget)
+        except asyncio.TimeoutError:
+            raise AnswerServiceError(504, {"error": "Remote answer timed out", "info": f"no answer within {budget:.0f}s"})
+
+    async def _call(self, client: httpx.AsyncClient, payload: dict, expires: float) -> str:
+        async with self._semaphore:
+            return await self._post_with_retries(client, payload, expires)
+
+    async def _post_with_retries(self, client: httpx.AsyncClient, payload: dict, expires: float) -> str:
+        attempt = 0
+        while True:
+            remaining = expires - time.monotonic()
+            try:
+                resp = await client.post(self.url, json=payload, timeout=max(remaining, 0.1))
+            except httpx.TransportError as e:
+                # Connection refused/reset, read timeout, ...
+                error = AnswerServiceError(502, {"error": "Remote answer failed", "info": str(e)})
+            else:
+                if resp.status_code == 200:
+                    try:
+                        data = resp.json()
+                    except ValueError:
+                        data = None
+                    if not isinstance(data, dict) or "answer" not in data:
+                        raise AnswerServiceError(500, "Malformed response from answer service")
+                    return data["answer"]
+                error = AnswerServiceError(
+                    resp.status_code,
+                    {"error": "Remote answer failed", "info": resp.text},
+                )
+                if resp.status_code not in _RETRYABLE_STATUS:
+                    raise error
+
+            # Exponential backoff with full jitter, as long as it fits the deadline
+            delay = random.uniform(0, self.backoff * (2 ** attempt))
+            if attempt >= self.max_retries or time.monotonic() + delay >= expires:
+                raise error
+            logger.warning(f"Answer service failed ({error.status_code}); retry {attempt + 1} in {delay:.2f}s.")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def stream_answer(self, question: str, document: str, deadline: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Ask the service for a streamed answer and yield text chunks as they arrive.
+
+        The request carries `"stream": true`. Server-sent events (`data: ...`
+        lines, optionally JSON with a "token"/"text"/"answer" field, ended by
+        `[DONE]`) and plain chunked text are relayed as they come; a service
+        that ignores the flag and returns JSON yields its whole answer at once.
+        Nothing is retried once the response has started.
+        """
+        client = self._get_client()
+        budget = deadline if deadline is not None else self.deadline
+        expires = time.monotonic() + budget
+        payload = {"question": question, "document": document, "stream": True}
+
+        async with self._semaphore:
+            try:
+                async with client.stream("POST", self.url, json=payload, timeout=budget) as resp:
+                    if resp.status_code != 200:
+                        body = await resp.aread()
+                        raise AnswerServiceError(
+                            resp.status_code,
+                            {"error": "Remote answer failed", "info": body.decode("utf-8", "replace")},
+                        )
+
+                    content_type = resp.headers.get("content-type", "")
+                    if "text/event-stream" in content_type:
+                        chunks = _iter_sse_tokens(resp)
+                    elif "application/json" in content_type:
+                        chunks = _iter_json_answer(resp)
+                    else:
+                        chunks = resp.aiter_text()
+
+                    async for chunk in chunks:
+                        if time.monotonic() > expires:
+                            raise AnswerServiceError(504, {"error": "Remote answer timed out", "info": f"no answer within {budget:.0f}s"})
+                        if chunk:
+                            yield chunk
+            except httpx.TransportError as e:
+                raise AnswerServiceError(502, {"error": "Remote answer failed", "info": str(e)})
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphore = None
+
+
+async def _iter_sse_tokens(resp: httpx.Response) -> AsyncIterator[str]:
+    async for line in resp.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:]
+        if data.startswith(" "):
+            data = data[1:]
+        if data.strip() == "[DONE]":
+            return
+        try:
+            event = json.loads(data)
+        except ValueError:
+            yield data
+            continue
+        if isinstance(event, dict):
+            yield event.get("token") or event.get("text") or event.get("answer") or ""
+        elif isinstance(event, str):
+            yield event
+
+
+async def _iter_json_answer(resp: httpx.Response) -> AsyncIterator[str]:
+    try:
+        data = json.loads(await resp.aread())
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or "answer" not in data:
+        raise AnswerServiceError(500, "Malformed response from answer service")
+    yield data["answer"]
+
+
+# Shared client for the whole process
+answer_client = AnswerClient()
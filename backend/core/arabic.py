@@ -0,0 +1,27 @@
+# backend/core/arabic.py
+import re
+
+# Harakat, tanween, shadda, sukun, superscript alef and Quranic marks
+_DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED]")
+_TATWEEL    = "\u0640"
+_ALEF       = re.compile(r"[\u0622\u0623\u0625\u0671]")   # آ أ إ ٱ → ا
+_SPACES     = re.compile(r"\s+")
+_PUNCT      = re.compile(r"[^\w\s]")
+
+
+def normalize_arabic(text: str, strip_punctuation: bool = True) -> str:
+    """
+    Normalize text for matching (cache keys, keyword search), not for display:
+      - remove diacritics and tatweel (ـ)
+      - unify alef forms to ا, ى to ي and ة to ه
+      - lowercase Latin text, drop punctuation and collapse whitespace
+    """
+    if not text:
+        return ""
+    text = _DIACRITICS.sub("", text).replace(_TATWEEL, "")
+    text = _ALEF.sub("ا", text)
+    text = text.replace("ى", "ي").replace("ة", "ه")
+    text = text.lower()
+    if strip_punctuation:
+        text = _PUNCT.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
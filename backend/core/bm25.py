@@ -0,0 +1,98 @@
+# backend/core/bm25.py
+import heapq
+import math
+from collections import Counter
+from typing import Callable, Dict, Hashable, Iterable, List, Sequence, Tuple
+
+from langchain.schema import Document
+
+from backend.core.arabic import normalize_arabic
+
+# Arabic proclitics stripped from the front of longer words ("والخدمات" → "خدمات")
+_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+
+
+def tokenize(text: str) -> List[str]:
+    """Normalized search terms of `text` (see normalize_arabic) with "ال"-type prefixes removed."""
+    tokens = []
+    for token in normalize_arabic(text).split():
+        for prefix in _PREFIXES:
+            if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+                token = token[len(prefix):]
+                break
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed list of documents, kept as an inverted index
+    (term → [(doc, term frequency)]), so a query only touches the postings
+    of its own terms.
+    """
+
+    def __init__(self, documents: Sequence[Document], k1: float = 1.5, b: float = 0.75):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._lengths: List[int] = []
+        for i, doc in enumerate(self.documents):
+            terms = Counter(tokenize(doc.page_content))
+            self._lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self._postings.setdefault(term, []).append((i, tf))
+
+        n = len(self.documents)
+        self._avg_length = (sum(self._lengths) / n) if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[Document, float]]:
+        """The `k` best-scoring documents for `query`, best first (no zero scores)."""
+        scores: Dict[int, float] = {}
+        avg = self._avg_length or 1.0
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self._postings[term]:
+                norm = tf + self.k1 * (1 - self.b + self.b * self._lengths[i] / avg)
+                scores[i] = scores.get(i, 0.0) + idf * tf * (self.k1 + 1) / norm
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.documents[i], score) for i, score in best]
+
+
+def document_key(doc: Document) -> Hashable:
+    """Identity of a passage across retrievers: its page and position, else its text."""
+    source = doc.metadata.get("source")
+    if source is not None:
+        return (source, doc.metadata.get("chunk_index", 0))
+    return doc.page_content
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[Document]],
+    k: int = 60,
+    key: Callable[[Document], Hashable] = document_key,
+) -> List[Document]:
+    """
+    Merge ranked lists with RRF: each document scores sum(1 / (k + rank))
+    over the lists it appears in. Needs no score calibration between dense
+    and sparse retrievers; ties keep first-seen order.
+    """
+    scores: Dict[Hashable, float] = {}
+    docs: Dict[Hashable, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            doc_id = key(doc)
+            docs.setdefault(doc_id, doc)
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    order = sorted(scores, key=scores.__getitem__, reverse=True)
+    return [docs[doc_id] for doc_id in order]
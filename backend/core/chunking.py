@@ -0,0 +1,74 @@
+# backend/core/chunking.py
+import re
+from typing import List
+
+# Sentence ends: Latin and Arabic full stop/question mark/semicolon, "!" and line breaks
+_SENTENCE_END = re.compile(r"(?<=[.!?؟؛۔])\s+|\n+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for budgeting prompt size without loading a tokenizer.
+    Subword tokenizers split Arabic words into ~1.5 pieces on average, so
+    count words and scale up.
+    """
+    return int(len(text.split()) * 1.5) + 1
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split Arabic/English text into sentences (scraped lines count as sentences)."""
+    return [s.strip() for s in _SENTENCE_END.split(text) if s and s.strip()]
+
+
+def chunk_text(text: str, chunk_size: int = 800, overlap: int = 150) -> List[str]:
+    """
+    Split `text` into passages of about `chunk_size` characters, breaking only
+    at sentence boundaries. Consecutive passages share roughly `overlap`
+    characters of trailing sentences so an answer that straddles a boundary
+    is still retrievable. A single sentence longer than `chunk_size` is cut
+    at word boundaries.
+    """
+    sentences: List[str] = []
+    for sentence in split_sentences(text):
+        if len(sentence) <= chunk_size:
+            sentences.append(sentence)
+        else:
+            sentences.extend(_split_long(sentence, chunk_size))
+
+    chunks: List[str] = []
+    current: List[str] = []
+    length = 0
+    for sentence in sentences:
+        if current and length + len(sentence) + 1 > chunk_size:
+            chunks.append("\n".join(current))
+            # Carry trailing sentences over as overlap
+            carried: List[str] = []
+            carried_len = 0
+            for prev in reversed(current):
+                if carried_len + len(prev) > overlap:
+                    break
+                carried.insert(0, prev)
+                carried_len += len(prev) + 1
+            current, length = carried, carried_len
+        current.append(sentence)
+        length += len(sentence) + 1
+
+    if current:
+        tail = "\n".join(current)
+        # Don't emit a final chunk that is nothing but overlap
+        if not chunks or not chunks[-1].endswith(tail):
+            chunks.append(tail)
+    return chunks
+
+
+def _split_long(sentence: str, chunk_size: int) -> List[str]:
+    pieces, current = [], ""
+    for word in sentence.split():
+        if current and len(current) + len(word) + 1 > chunk_size:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
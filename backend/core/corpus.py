@@ -0,0 +1,100 @@
+# backend/core/corpus.py
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, Union
+
+PathLike = Union[str, Path]
+
+
+def resolve_corpus_path(path: PathLike) -> Path:
+    """
+    Return `path` if it exists, otherwise its sibling with the other corpus
+    extension (.jsonl ↔ .json), so code pointed at the new JSONL corpus keeps
+    working with an older JSON array export and vice versa. Failing both,
+    the `.jsonl.partial` file of a crawl in progress (or an interrupted one)
+    is used.
+    """
+    path = Path(path)
+    if path.exists():
+        return path
+    alt = path.with_suffix(".json" if path.suffix == ".jsonl" else ".jsonl")
+    if alt.exists():
+        return alt
+    jsonl = path if path.suffix == ".jsonl" else alt
+    partial = jsonl.with_name(jsonl.name + ".partial")
+    return partial if partial.exists() else path
+
+
+def is_jsonl(path: PathLike) -> bool:
+    """JSONL corpora, including the `.partial` file CorpusWriter writes to."""
+    return Path(path).name.endswith((".jsonl", ".jsonl.partial"))
+
+
+def iter_corpus(path: PathLike) -> Iterator[dict]:
+    """
+    Yield corpus records one at a time.
+
+    JSONL files (one JSON object per line) are streamed, so memory stays flat
+    however large the crawl gets; a truncated last line, as left by an
+    interrupted crawl, is skipped. Legacy .json files holding one array are
+    still accepted, but have to be loaded whole.
+    """
+    path = resolve_corpus_path(path)
+    if not is_jsonl(path):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                print(f"Warning: skipping unreadable line {lineno} in {path}")
+
+
+class CorpusWriter:
+    """
+    Append records to a JSONL corpus as they are produced.
+
+    Records go to `<path>.partial`, flushed after every record, so a crawl in
+    progress (or one that crashed) can already be read with iter_corpus().
+    close() renames the file to `path`, replacing the previous corpus only
+    once the new one is complete.
+    """
+
+    def __init__(self, path: PathLike):
+        self.path = Path(path)
+        self.partial_path = self.path.with_name(self.path.name + ".partial")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.partial_path, "w", encoding="utf-8")
+        self.count = 0
+
+    def write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+        self._file.flush()
+        self.count += 1
+
+    def write_all(self, records: Iterable[dict]) -> int:
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self, commit: bool = True) -> None:
+        if self._file.closed:
+            return
+        self._file.close()
+        if commit:
+            os.replace(self.partial_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Keep the .partial file on errors: it still holds everything written so far
+        self.close(commit=exc_type is None)
@@ -0,0 +1,126 @@
+# backend/core/embedding_batcher.py
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("EmbeddingBatcher")
+
+_STOP = object()
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embed requests into batched forward passes.
+
+    Callers submit one text each and block on a Future. A single worker
+    thread takes the first waiting text, collects whatever else arrives
+    within `max_wait_ms` (up to `max_batch_size` texts), embeds the batch
+    with one `embed_many` call and resolves every caller's Future. Texts
+    queued while a batch is running go into the next one, so under load
+    batches fill up on their own; a lone request waits at most
+    `max_wait_ms`.
+    """
+
+    def __init__(
+        self,
+        embed_many: Callable[[List[str]], List[List[float]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+    ):
+        self._embed_many = embed_many
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.texts = 0
+        self.largest_batch = 0
+
+    def submit(self, text: str) -> Future:
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str, timeout: Optional[float] = None) -> List[float]:
+        """Embedding of `text`, computed in a batch with any concurrent requests."""
+        return self.submit(text).result(timeout=timeout)
+
+    def close(self) -> None:
+        """Stop the worker once it has finished the requests already queued."""
+        with self._start_lock:
+            if self._worker is not None:
+                self._queue.put(_STOP)
+                self._worker.join(timeout=5)
+                self._worker = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "largest_batch": self.largest_batch,
+            "average_batch": round(self.texts / self.batches, 2) if self.batches else 0.0,
+        }
+
+    # ─── worker ───────────────────────────────────────────────────────────────
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stop = False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._process(batch)
+            if stop:
+                return
+
+    def _process(self, batch: List[Tuple[str, Future]]) -> None:
+        # Identical texts in one batch are embedded once
+        unique = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = dict(zip(unique, self._embed_many(unique)))
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(unique)} failed: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.texts += len(unique)
+        self.largest_batch = max(self.largest_batch, len(unique))
+        for text, future in batch:
+            future.set_result(vectors[text])
+
+
+def embedding_batcher_from_env(embed_many: Callable[[List[str]], List[List[float]]]) -> Optional[EmbeddingBatcher]:
+    """
+    Build an EmbeddingBatcher configured by environment variables:
+      EMBED_BATCH_SIZE (32; 0 disables batching), EMBED_BATCH_WAIT_MS (2).
+    """
+    size = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+    if size <= 0:
+        return None
+    return EmbeddingBatcher(embed_many, max_batch_size=size, max_wait_ms=float(os.getenv("EMBED_BATCH_WAIT_MS", "2")))
@@ -0,0 +1,124 @@
+# backend/core/embedding_cache.py
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from backend.core.arabic import normalize_arabic
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings, so a repeated question skips the
+    embedding model's forward pass.
+
+    Queries are keyed by their normalize_arabic() form (diacritics, tatweel
+    and alef variants don't matter) together with the model name and
+    embedding backend (torch and int8 ONNX vectors differ slightly). With
+    `path` set, embeddings are also written to a SQLite file and survive
+    restarts; the in-memory tier is checked first.
+    """
+
+    def __init__(self, model_name: str, max_entries: int = 1024, path: Optional[str] = None, backend: str = "torch"):
+        self.model_name = model_name
+        self.backend = backend
+        self._model_key = f"{model_name}@{backend}"
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._conn = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                " model TEXT NOT NULL,"
+                " query TEXT NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " PRIMARY KEY (model, query))"
+            )
+            self._conn.commit()
+
+    def get_or_compute(self, query: str, embed: Callable[[str], List[float]]) -> List[float]:
+        """The cached embedding of `query`, computing it with `embed` on a miss."""
+        key = normalize_arabic(query)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+            vector = self._read_disk(key)
+            if vector is not None:
+                self.disk_hits += 1
+                self._remember(key, vector)
+                return vector
+            self.misses += 1
+
+        # Embed outside the lock so other queries aren't held up
+        vector = list(embed(query))
+        with self._lock:
+            self._remember(key, vector)
+            self._write_disk(key, vector)
+        return vector
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    # ─── internals (call with the lock held) ─────────────────────────────────
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[List[float]]:
+        if self._conn is None:
+            return None
+        row = self._conn.execute(
+            "SELECT vector FROM query_embeddings WHERE model = ? AND query = ?", (self._model_key, key)
+        ).fetchone()
+        return None if row is None else np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def _write_disk(self, key: str, vector: List[float]) -> None:
+        if self._conn is None:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO query_embeddings (model, query, vector) VALUES (?, ?, ?)",
+            (self._model_key, key, np.asarray(vector, dtype=np.float32).tobytes()),
+        )
+        self._conn.commit()
+
+
+def query_embedding_cache_from_env(model_name: str, backend: str = "torch") -> Optional[QueryEmbeddingCache]:
+    """
+    Build a QueryEmbeddingCache configured by environment variables:
+      QUERY_EMBED_CACHE_SIZE (1024; 0 disables the cache),
+      QUERY_EMBED_CACHE_PATH to also keep embeddings in that SQLite file.
+    """
+    size = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "1024"))
+    if size <= 0:
+        return None
+    return QueryEmbeddingCache(
+        model_name, max_entries=size, path=os.getenv("QUERY_EMBED_CACHE_PATH") or None, backend=backend
+    )
@@ -0,0 +1,122 @@
+# backend/core/faiss_index.py
+import logging
+import math
+import os
+from typing import List, Optional
+
+logger = logging.getLogger("FaissIndex")
+
+# "flat" is exact search over float32 vectors (FAISS.from_texts); the others
+# trade some recall for speed and/or memory on large corpora:
+#   sq8      - exact scan over 8-bit scalar-quantized vectors (4x smaller)
+#   ivf-flat - inverted file: only `nprobe` of the clusters are scanned
+#   ivf-pq   - inverted file + product-quantized codes (smallest)
+#   hnsw     - graph search, tuned at query time with `efSearch`
+INDEX_TYPES = ("flat", "sq8", "ivf-flat", "ivf-pq", "hnsw")
+
+# Query-time knobs, applied whenever an index is loaded
+DEFAULT_NPROBE = int(os.getenv("FAISS_NPROBE", "8"))
+DEFAULT_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+
+# FAISS wants ~39 training points per centroid
+_MIN_POINTS_PER_CENTROID = 39
+_HNSW_M = 32
+_HNSW_EF_CONSTRUCTION = 80
+
+
+def factory_string(index_type: str, dim: int, n_vectors: int) -> Optional[str]:
+    """
+    faiss.index_factory() description for `index_type`, sized for
+    `n_vectors`, or None for a flat index (also used when the corpus is too
+    small to train the requested structure).
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type '{index_type}'; expected one of {INDEX_TYPES}")
+    if index_type == "flat":
+        return None
+    if index_type == "sq8":
+        return "SQ8"
+    if index_type == "hnsw":
+        return f"HNSW{_HNSW_M}"
+
+    nlist = min(int(4 * math.sqrt(n_vectors)), n_vectors // _MIN_POINTS_PER_CENTROID)
+    if nlist < 2:
+        logger.warning(f"{n_vectors} vectors are too few to train '{index_type}'; using a flat index.")
+        return None
+    if index_type == "ivf-flat":
+        return f"IVF{nlist},Flat"
+
+    # ivf-pq: as many sub-quantizers as divide the dimension (≥ 4 dims each),
+    # and as many bits per code as the training set supports
+    m = next((m for m in (64, 48, 32, 24, 16, 8) if dim % m == 0 and dim // m >= 4), None)
+    nbits = min(8, int(math.log2(n_vectors / _MIN_POINTS_PER_CENTROID)))
+    if m is None or nbits < 4:
+        logger.warning(f"Cannot train product quantization on {n_vectors} vectors; using 'ivf-flat'.")
+        return f"IVF{nlist},Flat"
+    return f"IVF{nlist},PQ{m}x{nbits}"
+
+
+def build_store(texts: List[str], embedder, metadatas: List[dict], ids: List[str], index_type: str = "flat"):
+    """
+    Embed `texts` and return a LangChain FAISS store backed by an index of
+    `index_type`, trained on the same vectors.
+    """
+    from langchain_community.vectorstores import FAISS
+
+    if index_type == "flat":
+        return FAISS.from_texts(texts, embedding=embedder, metadatas=metadatas, ids=ids)
+
+    import faiss
+    import numpy as np
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain.schema import Document
+
+    vectors = np.asarray(embedder.embed_documents(texts), dtype=np.float32)
+    spec = factory_string(index_type, vectors.shape[1], len(vectors))
+    if spec is None:
+        return FAISS.from_embeddings(list(zip(texts, vectors.tolist())), embedder, metadatas=metadatas, ids=ids)
+
+    index = faiss.index_factory(vectors.shape[1], spec)
+    if index_type == "hnsw":
+        index.hnsw.efConstruction = _HNSW_EF_CONSTRUCTION
+    if not index.is_trained:
+        logger.info(f"Training FAISS index '{spec}' on {len(vectors)} vectors")
+        index.train(vectors)
+    index.add(vectors)
+
+    docstore = InMemoryDocstore({
+        doc_id: Document(page_content=text, metadata=metadata)
+        for doc_id, text, metadata in zip(ids, texts, metadatas)
+    })
+    store = FAISS(
+        embedding_function=embedder,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+    apply_search_params(store)
+    return store
+
+
+def supports_removal(store) -> bool:
+    """
+    Whether vectors can be deleted from `store` in place. LangChain's
+    FAISS.delete() renumbers the remaining vectors 0..n-1, which only holds
+    for indexes that compact on removal (flat, sq8). IVF indexes keep their
+    ids, and HNSW graphs can't delete at all; changed documents in either
+    need a rebuild.
+    """
+    import faiss
+
+    return faiss.try_extract_index_ivf(store.index) is None and not hasattr(store.index, "hnsw")
+
+
+def apply_search_params(store, nprobe: int = DEFAULT_NPROBE, ef_search: int = DEFAULT_EF_SEARCH) -> None:
+    """Set the query-time knobs of `store`'s index (no-op for flat indexes)."""
+    import faiss
+
+    ivf = faiss.try_extract_index_ivf(store.index)
+    if ivf is not None:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+    if hasattr(store.index, "hnsw"):
+        store.index.hnsw.efSearch = ef_search
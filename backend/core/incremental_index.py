@@ -0,0 +1,185 @@
+# backend/core/incremental_index.py
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from backend.core.faiss_index import build_store, supports_removal
+
+logger = logging.getLogger("IncrementalIndexer")
+
+MANIFEST_FILE = "manifest.json"
+
+# One update at a time per index directory
+_dir_locks: Dict[str, threading.Lock] = {}
+_dir_locks_guard = threading.Lock()
+
+
+class IndexEntry(NamedTuple):
+    """One source document: a stable key (e.g. its URL) and its indexed texts."""
+    key: str
+    texts: List[str]
+    metadatas: List[dict]
+
+
+def entry_hash(entry: IndexEntry) -> str:
+    """Content hash of everything that gets embedded for one document."""
+    h = hashlib.sha256()
+    for text, metadata in zip(entry.texts, entry.metadatas):
+        h.update(text.encode("utf-8"))
+        h.update(b"\0")
+        h.update(json.dumps(metadata, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class IncrementalIndexer:
+    """
+    Keeps a FAISS index in sync with a corpus without re-embedding all of it.
+
+    A manifest next to the index maps each document key to the hash of its
+    content and the FAISS docstore IDs of its vectors. On update(), only new
+    or changed documents are embedded, vectors of changed or deleted documents
+    are removed, and the result is written to a temporary directory and moved
+    into place, so readers never load a half-written index. If the build
+    `settings` differ from the manifest's (e.g. another chunk size or
+    `index_type`), or there is no manifest, the index is rebuilt from scratch.
+    So is an IVF or HNSW index (`index_type`, see core/faiss_index.py) that
+    would need vectors removed: IVF indexes don't compact their ids the way
+    LangChain's FAISS.delete() assumes, and HNSW can't remove vectors.
+    """
+
+    def __init__(self, index_dir, embedder_factory: Callable[[], object], index_type: str = "flat"):
+        self.index_dir = Path(index_dir)
+        # Only called when something actually needs embedding
+        self._embedder_factory = embedder_factory
+        self.index_type = index_type
+
+    def update(self, entries: List[IndexEntry], settings: Optional[dict] = None):
+        """
+        Bring the index in line with `entries`. Returns the updated FAISS store,
+        or None if the index was already up to date.
+        """
+        with _dir_locks_guard:
+            lock = _dir_locks.setdefault(str(self.index_dir.resolve()), threading.Lock())
+        settings = dict(settings or {})
+        if self.index_type != "flat":
+            # Flat is left out so indexes built before index types existed stay valid
+            settings["index_type"] = self.index_type
+        with lock:
+            return self._update(entries, settings)
+
+    def _update(self, entries: List[IndexEntry], settings: dict):
+        manifest = self._read_manifest()
+        wanted: Dict[str, IndexEntry] = {}
+        for entry in entries:
+            if entry.texts:
+                wanted[entry.key] = entry
+        hashes = {key: entry_hash(entry) for key, entry in wanted.items()}
+
+        index_exists = (self.index_dir / "index.faiss").exists()
+        if manifest is None or not index_exists or manifest.get("settings") != settings:
+            return self._rebuild(wanted, hashes, settings)
+
+        known = manifest["documents"]
+        removed = [key for key in known if key not in wanted]
+        changed = [key for key in wanted if key in known and known[key]["hash"] != hashes[key]]
+        added = [key for key in wanted if key not in known]
+
+        if not (removed or changed or added):
+            logger.info(f"Index at '{self.index_dir}' is up to date ({len(known)} documents).")
+            return None
+
+        from langchain_community.vectorstores import FAISS
+
+        store = FAISS.load_local(
+            str(self.index_dir),
+            embeddings=self._embedder_factory(),
+            allow_dangerous_deserialization=True,
+        )
+
+        stale_ids = [vid for key in removed + changed for vid in known[key]["ids"]]
+        if stale_ids and not supports_removal(store):
+            logger.info(f"Index at '{self.index_dir}' can't remove vectors; rebuilding.")
+            return self._rebuild(wanted, hashes, settings)
+        if stale_ids:
+            store.delete(stale_ids)
+        for key in removed:
+            del known[key]
+
+        texts, metadatas, ids = [], [], []
+        for key in changed + added:
+            entry = wanted[key]
+            entry_ids = self._vector_ids(key, hashes[key], len(entry.texts))
+            texts.extend(entry.texts)
+            metadatas.extend(entry.metadatas)
+            ids.extend(entry_ids)
+            known[key] = {"hash": hashes[key], "ids": entry_ids}
+        if texts:
+            store.add_texts(texts, metadatas=metadatas, ids=ids)
+
+        self._save(store, {"settings": settings, "documents": known})
+        logger.info(
+            f"Index at '{self.index_dir}' updated: {len(added)} added, {len(changed)} changed, "
+            f"{len(removed)} removed, {len(texts)} vectors embedded."
+        )
+        return store
+
+    # ─── internals ────────────────────────────────────────────────────────────
+    def _rebuild(self, wanted: Dict[str, IndexEntry], hashes: Dict[str, str], settings: dict):
+        if not wanted:
+            raise ValueError("No valid documents found to index")
+
+        texts, metadatas, ids, documents = [], [], [], {}
+        for key, entry in wanted.items():
+            entry_ids = self._vector_ids(key, hashes[key], len(entry.texts))
+            texts.extend(entry.texts)
+            metadatas.extend(entry.metadatas)
+            ids.extend(entry_ids)
+            documents[key] = {"hash": hashes[key], "ids": entry_ids}
+
+        store = build_store(texts, self._embedder_factory(), metadatas, ids, index_type=self.index_type)
+        self._save(store, {"settings": settings, "documents": documents})
+        logger.info(f"Index at '{self.index_dir}' rebuilt: {len(documents)} documents, {len(texts)} vectors.")
+        return store
+
+    @staticmethod
+    def _vector_ids(key: str, content_hash: str, count: int) -> List[str]:
+        # Unique per (document, content), so identical pages under two URLs don't collide
+        prefix = hashlib.sha256(f"{key}\0{content_hash}".encode("utf-8")).hexdigest()[:24]
+        return [f"{prefix}-{i}" for i in range(count)]
+
+    def _read_manifest(self) -> Optional[dict]:
+        try:
+            with open(self.index_dir / MANIFEST_FILE, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logger.warning(f"Unreadable manifest in '{self.index_dir}', rebuilding: {e}")
+            return None
+        if not isinstance(manifest, dict) or not isinstance(manifest.get("documents"), dict):
+            return None
+        return manifest
+
+    def _save(self, store, manifest: dict) -> None:
+        """Write index + manifest to a sibling directory, then swap it in."""
+        parent = self.index_dir.parent
+        parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = parent / f".{self.index_dir.name}.tmp"
+        old_dir = parent / f".{self.index_dir.name}.old"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+        store.save_local(str(tmp_dir))
+        with open(tmp_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+        if self.index_dir.exists():
+            os.replace(self.index_dir, old_dir)
+        os.replace(tmp_dir, self.index_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
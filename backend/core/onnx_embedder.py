@@ -0,0 +1,157 @@
+# backend/core/onnx_embedder.py
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger("OnnxEmbeddings")
+
+# Exported (and quantized) models are kept here, one directory per model
+ONNX_CACHE_DIR = Path(os.getenv("ONNX_CACHE_DIR", Path(__file__).resolve().parent.parent / "onnx_models"))
+
+# Used when a model has no sentence-transformers config (BERT's position limit)
+DEFAULT_MAX_LENGTH = 512
+
+_export_lock = threading.Lock()
+
+
+def export_onnx_model(model_name: str, quantize: bool = True, cache_dir: Path = ONNX_CACHE_DIR) -> Path:
+    """
+    Export `model_name` to ONNX (once) and, with `quantize`, write a copy with
+    dynamically int8-quantized weights next to it. Returns the .onnx file to
+    load. Exporting needs `optimum[onnxruntime]` (and torch); running the
+    exported model only needs onnxruntime.
+    """
+    model_dir = Path(cache_dir) / model_name.replace("/", "__")
+    fp32_path = model_dir / "model.onnx"
+    int8_path = model_dir / "model_int8.onnx"
+    target = int8_path if quantize else fp32_path
+
+    with _export_lock:
+        if not (model_dir / "sentence_bert_config.json").exists():
+            _save_sentence_config(model_name, model_dir)
+        if target.exists():
+            return target
+
+        if not fp32_path.exists():
+            from optimum.onnxruntime import ORTModelForFeatureExtraction
+            from transformers import AutoTokenizer
+
+            logger.info(f"Exporting '{model_name}' to ONNX in '{model_dir}'")
+            model_dir.mkdir(parents=True, exist_ok=True)
+            ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(model_dir)
+            AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            logger.info(f"Quantizing '{model_name}' weights to int8")
+            tmp_path = model_dir / "model_int8.onnx.tmp"
+            quantize_dynamic(str(fp32_path), str(tmp_path), weight_type=QuantType.QInt8)
+            os.replace(tmp_path, int8_path)
+    return target
+
+
+def _save_sentence_config(model_name: str, model_dir: Path) -> None:
+    """
+    Copy the model's sentence_bert_config.json (max_seq_length, casing) next
+    to the export. Models without one get an empty config, so the lookup
+    isn't repeated.
+    """
+    from huggingface_hub import hf_hub_download
+    from huggingface_hub.utils import EntryNotFoundError
+
+    try:
+        with open(hf_hub_download(model_name, "sentence_bert_config.json"), encoding="utf-8") as f:
+            config = json.load(f)
+    except EntryNotFoundError:
+        config = {}
+    model_dir.mkdir(parents=True, exist_ok=True)
+    with open(model_dir / "sentence_bert_config.json", "w", encoding="utf-8") as f:
+        json.dump(config, f)
+
+
+def sentence_max_length(model_dir: Path) -> int:
+    """
+    The token limit sentence-transformers truncates inputs to for the
+    exported model in `model_dir` (e.g. 256 for all-MiniLM-L6-v2, 512 for
+    multilingual-e5-base).
+    """
+    try:
+        with open(Path(model_dir) / "sentence_bert_config.json", encoding="utf-8") as f:
+            return int(json.load(f).get("max_seq_length") or DEFAULT_MAX_LENGTH)
+    except FileNotFoundError:
+        return DEFAULT_MAX_LENGTH
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Drop-in replacement for HuggingFaceEmbeddings that runs a
+    sentence-transformers model through ONNX Runtime on CPU, optionally with
+    int8 weights. Mean pooling over the attention mask followed by L2
+    normalization, as in the e5 and MiniLM sentence-transformers configs, and
+    inputs truncated at the model's own max_seq_length (unless `max_length`
+    is given), so vectors are interchangeable with the PyTorch ones (see
+    bench_embeddings.py for the parity check). Neither torch nor
+    sentence-transformers is imported at inference time.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        quantize: bool = True,
+        batch_size: int = 32,
+        max_length: Optional[int] = None,
+        threads: Optional[int] = None,
+        cache_dir: Path = ONNX_CACHE_DIR,
+    ):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.quantize = quantize
+        self.batch_size = max(1, batch_size)
+        model_path = export_onnx_model(model_name, quantize=quantize, cache_dir=cache_dir)
+        self.max_length = max_length or sentence_max_length(model_path.parent)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_path.parent))
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed `texts` in length-sorted batches; returns vectors in input order."""
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._embed_batch([texts[i] for i in batch])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_batch([text])[0].tolist()
+
+    def _embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            list(texts),
+            padding="longest",
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np",
+        )
+        inputs: Dict[str, np.ndarray] = {
+            name: value.astype(np.int64) for name, value in encoded.items() if name in self._input_names
+        }
+        hidden = self.session.run(None, inputs)[0]                        # (batch, tokens, dim)
+        mask = encoded["attention_mask"][..., None].astype(hidden.dtype)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
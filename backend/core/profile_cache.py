@@ -0,0 +1,171 @@
+# backend/core/profile_cache.py
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger("ProfileCache")
+
+
+class ProfileCache:
+    """
+    Stores the generated institution profile on disk together with a
+    fingerprint of its inputs, and serves it with stale-while-revalidate:
+
+      - fresh (fingerprint matches): returned immediately
+      - stale (inputs changed): the old profile is returned immediately and
+        one background thread regenerates it
+      - nothing stored yet: the first caller generates it; concurrent callers
+        wait for that same generation instead of starting their own
+
+    `generate` returns the profile text and should raise on failure so that
+    error messages never get cached. `fingerprint` must be cheap; it is
+    re-checked at most every `check_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        path,
+        generate: Callable[[], str],
+        fingerprint: Callable[[], str],
+        check_interval: float = 10.0,
+    ):
+        self.path = Path(path)
+        self._generate = generate
+        self._fingerprint = fingerprint
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._generate_lock = threading.Lock()   # one generation at a time
+        self._refreshing = False
+        self._current_fp: Optional[str] = None
+        self._checked_at = 0.0
+        self._record: Optional[dict] = self._read()
+
+    # ─── public API ───────────────────────────────────────────────────────────
+    def get(self) -> dict:
+        """
+        Return {"profile", "generated_at", "stale"}; may block only when no
+        profile has ever been generated.
+        """
+        fingerprint = self._input_fingerprint()
+        record = self._record
+
+        if record is None:
+            record = self._regenerate(fingerprint)
+            return self._response(record, stale=False)
+
+        if record.get("fingerprint") != fingerprint:
+            self._refresh_in_background(fingerprint)
+            return self._response(record, stale=True)
+
+        return self._response(record, stale=False)
+
+    def fresh(self) -> Optional[dict]:
+        """The stored profile if its inputs are unchanged, else None; never generates."""
+        record = self._record
+        if record is None or record.get("fingerprint") != self._input_fingerprint():
+            return None
+        return self._response(record, stale=False)
+
+    def store(self, profile: str) -> dict:
+        """
+        Record a profile generated elsewhere (e.g. streamed to a client),
+        fingerprinted against the inputs as they are now.
+        """
+        with self._generate_lock:
+            record = self._record_for(profile)
+            return self._response(record, stale=False)
+
+    def refresh(self, background: bool = True) -> None:
+        """Force regeneration, e.g. from an admin action."""
+        fingerprint = self._input_fingerprint(force=True)
+        if background:
+            self._refresh_in_background(fingerprint, force=True)
+        else:
+            self._regenerate(fingerprint, force=True)
+
+    # ─── internals ────────────────────────────────────────────────────────────
+    def _input_fingerprint(self, force: bool = False) -> str:
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._current_fp is not None and now - self._checked_at < self.check_interval:
+                return self._current_fp
+        fingerprint = self._fingerprint()
+        with self._lock:
+            self._current_fp, self._checked_at = fingerprint, now
+        return fingerprint
+
+    def _refresh_in_background(self, fingerprint: str, force: bool = False) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def _run():
+            try:
+                self._regenerate(fingerprint, force=force)
+            except Exception as e:
+                # Keep serving the stale profile; the next request retries
+                logger.error(f"Background profile regeneration failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=_run, name="profile-refresh", daemon=True).start()
+
+    def _regenerate(self, fingerprint: str, force: bool = False) -> dict:
+        with self._generate_lock:
+            # Someone else may have finished the same work while we waited
+            record = self._record
+            if not force and record is not None and record.get("fingerprint") == fingerprint:
+                return record
+
+            logger.info("Generating institution profile...")
+            start = time.perf_counter()
+            record = self._record_for(self._generate())
+            logger.info(f"Institution profile generated in {time.perf_counter() - start:.1f}s")
+            return record
+
+    def _record_for(self, profile: str) -> dict:
+        # Generation can create its own inputs (e.g. the vector index on a
+        # fresh deploy), so fingerprint what it actually ran against
+        record = {
+            "fingerprint": self._input_fingerprint(force=True),
+            "generated_at": datetime.utcnow().isoformat(),
+            "profile": profile,
+        }
+        self._write(record)
+        self._record = record
+        return record
+
+    def _read(self) -> Optional[dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+            return record if isinstance(record, dict) and "profile" in record else None
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable profile cache at {self.path}: {e}")
+            return None
+
+    def _write(self, record: dict) -> None:
+        # Write to a temp file and rename so a crash never leaves half a file
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _response(record: dict, stale: bool) -> dict:
+        return {
+            "profile": record["profile"],
+            "generated_at": record.get("generated_at"),
+            "stale": stale,
+        }
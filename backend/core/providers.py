@@ -0,0 +1,85 @@
+# backend/core/providers.py
+import logging
+import threading
+import time
+from typing import Callable, Dict, Generic, Iterable, Optional, TypeVar
+
+logger = logging.getLogger("ModelProviders")
+
+T = TypeVar("T")
+
+# Every provider registers itself here so it can be warmed up or inspected by name
+PROVIDERS: Dict[str, "LazyProvider"] = {}
+
+
+class LazyProvider(Generic[T]):
+    """
+    Holds one heavy object (a model, an endpoint, an index) that is built by
+    `factory` on the first get() and then shared by the whole process.
+
+    Building happens under a lock, so concurrent first requests wait for a
+    single load instead of each loading their own copy. A failed load is not
+    cached; the next get() tries again.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self._factory = factory
+        self._value: Optional[T] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        PROVIDERS[name] = self
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> T:
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                logger.info(f"Loading '{self.name}'...")
+                self._value = self._factory()
+                self._loaded = True
+                logger.info(f"'{self.name}' ready in {time.perf_counter() - start:.1f}s")
+        return self._value
+
+    def reset(self) -> None:
+        """Forget the loaded object; the next get() builds a new one."""
+        with self._lock:
+            self._value = None
+            self._loaded = False
+
+
+def provider_status() -> Dict[str, bool]:
+    """{name: loaded} for every registered provider."""
+    return {name: p.loaded for name, p in PROVIDERS.items()}
+
+
+def warm_up(names: Optional[Iterable[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+    """
+    Load the given providers (all registered ones by default) ahead of the
+    first request. With background=True this runs in a daemon thread and
+    returns it; errors are logged and left for the real request to surface.
+    """
+    selected = list(names) if names is not None else list(PROVIDERS)
+
+    def _run():
+        for name in selected:
+            provider = PROVIDERS.get(name)
+            if provider is None:
+                logger.warning(f"Unknown provider '{name}', skipping warm-up.")
+                continue
+            try:
+                provider.get()
+            except Exception as e:
+                logger.error(f"Warm-up of '{name}' failed: {e}")
+
+    if not background:
+        _run()
+        return None
+    thread = threading.Thread(target=_run, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
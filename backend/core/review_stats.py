@@ -0,0 +1,130 @@
+# backend/core/review_stats.py
+from collections import Counter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+STAR_VALUES = (1, 2, 3, 4, 5)
+
+
+class _Fact(NamedTuple):
+    """The parts of a review the aggregates depend on."""
+    stars: int
+    sentiment: str
+    location: str
+    source: str
+
+
+class _Counts:
+    """Star histogram, sentiment and source counts for one group of reviews."""
+
+    __slots__ = ("count", "star_sum", "stars", "sentiment", "sources")
+
+    def __init__(self):
+        self.count = 0
+        self.star_sum = 0
+        self.stars = Counter()
+        self.sentiment = Counter()
+        self.sources = Counter()
+
+    def copy(self) -> "_Counts":
+        counts = _Counts()
+        counts.count, counts.star_sum = self.count, self.star_sum
+        counts.stars, counts.sentiment, counts.sources = self.stars.copy(), self.sentiment.copy(), self.sources.copy()
+        return counts
+
+    def add(self, fact: _Fact, sign: int) -> None:
+        self.count += sign
+        self.star_sum += sign * fact.stars
+        self.stars[fact.stars] += sign
+        self.sentiment[fact.sentiment] += sign
+        self.sources[fact.source] += sign
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "average_rating": round(self.star_sum / self.count, 2) if self.count else None,
+            "stars": {str(s): self.stars[s] for s in STAR_VALUES},
+            "sentiment": {label: n for label, n in sorted(self.sentiment.items()) if n},
+            "sources": {source: n for source, n in sorted(self.sources.items()) if n},
+        }
+
+
+class ReviewStats:
+    """
+    Aggregates over one set of reviews: overall and per-location star
+    histograms, average rating, sentiment distribution and source counts.
+
+    Instances never change once built. updated() diffs a new review set
+    against this one by id and returns a new instance, derived by adding or
+    subtracting only the reviews that appeared, changed or disappeared (the
+    location groups they touch are copied, the rest shared), so a reload
+    re-aggregates the change rather than rescanning every review. ReviewStore keeps the
+    instance matching its reviews in the same snapshot, so both are
+    published together. The summary is built once per change.
+    """
+
+    def __init__(self):
+        self._facts: Dict[int, _Fact] = {}
+        self._overall = _Counts()
+        self._locations: Dict[str, _Counts] = {}
+        self._summary = self._build_summary()
+
+    def updated(self, reviews: Iterable[Any]) -> Tuple["ReviewStats", Dict[str, int]]:
+        """Stats for `reviews`, derived from these; returns (stats, what changed)."""
+        new_facts = {
+            r.id: _Fact(r.stars, r.sentiment, r.location, r.source) for r in reviews
+        }
+        removed = [i for i in self._facts if i not in new_facts]
+        changed = [i for i, f in new_facts.items() if i in self._facts and self._facts[i] != f]
+        added = [i for i in new_facts if i not in self._facts]
+        changes = {"added": len(added), "changed": len(changed), "removed": len(removed)}
+        if not (removed or changed or added):
+            return self, changes
+
+        stats = ReviewStats.__new__(ReviewStats)
+        stats._facts = dict(self._facts)
+        stats._overall = self._overall.copy()
+        stats._locations = dict(self._locations)
+        copied = set()
+        for i in removed + changed:
+            stats._apply(stats._facts.pop(i), -1, copied)
+        for i in changed + added:
+            stats._facts[i] = new_facts[i]
+            stats._apply(new_facts[i], +1, copied)
+        stats._summary = stats._build_summary()
+        return stats, changes
+
+    def _apply(self, fact: _Fact, sign: int, copied: set) -> None:
+        self._overall.add(fact, sign)
+        group = self._locations.get(fact.location)
+        if group is None:
+            group = self._locations[fact.location] = _Counts()
+            copied.add(fact.location)
+        elif fact.location not in copied:
+            # Still shared with the previous instance
+            group = self._locations[fact.location] = group.copy()
+            copied.add(fact.location)
+        group.add(fact, sign)
+        if group.count == 0:
+            del self._locations[fact.location]
+            copied.discard(fact.location)
+
+    def _build_summary(self) -> dict:
+        return {
+            **self._overall.as_dict(),
+            "locations": [
+                {"location": name, **group.as_dict()}
+                for name, group in sorted(self._locations.items())
+            ],
+        }
+
+    # ─── reading ──────────────────────────────────────────────────────────────
+    def summary(self) -> dict:
+        """Overall aggregates plus one entry per location, sorted by name."""
+        return self._summary
+
+    def locations(self) -> List[str]:
+        return sorted(self._locations)
+
+    def location(self, name: str) -> Optional[dict]:
+        group = self._locations.get(name)
+        return None if group is None else {"location": name, **group.as_dict()}
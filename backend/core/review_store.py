@@ -0,0 +1,148 @@
+# backend/core/review_store.py
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from backend.core.review_stats import ReviewStats
+
+# Fields that can be filtered on (exact match) and sorted by
+INDEXED_FIELDS = ("stars", "sentiment", "location", "source", "reviewer", "since")
+SORT_FIELDS = ("id",) + INDEXED_FIELDS
+
+
+class _Snapshot(NamedTuple):
+    reviews: List[Any]                                # ordered by id
+    by_id: Dict[int, int]                             # id → position
+    indexes: Dict[str, Dict[Any, List[int]]]          # field → value → positions (ascending)
+    ranks: Dict[str, List[int]]                       # field → position → rank in sort order
+    orders: Dict[str, List[int]]                      # field → positions in sort order
+    stats: ReviewStats                                # aggregates over these reviews
+
+
+def _sort_key(value):
+    return (value is not None, value if value is not None else 0)
+
+
+class ReviewStore:
+    """
+    In-memory reviews with a secondary index per filterable field.
+
+    A query looks up the posting list of every filter and intersects them,
+    starting from the smallest, so its cost depends on the size of the
+    matches rather than on the number of reviews. Sort orders are
+    precomputed too: an unfiltered page is a slice, a filtered one is
+    sorted by precomputed rank.
+
+    The reviews, their indexes and their aggregates (ReviewStats) are one
+    immutable snapshot, replaced as a whole by replace(), so readers never
+    see a list, indexes and stats that disagree.
+    """
+
+    def __init__(self, reviews: Sequence[Any] = ()):
+        self._snapshot = self._build(reviews, ReviewStats().updated(reviews)[0])
+
+    # ─── writing ──────────────────────────────────────────────────────────────
+    def replace(self, reviews: Sequence[Any]) -> Dict[str, int]:
+        """
+        Index `reviews` and swap them in as the new contents; returns how many
+        reviews were added, changed (in any field, text included) and removed.
+        """
+        current = self._snapshot
+        added = changed = 0
+        for review in reviews:
+            pos = current.by_id.get(review.id)
+            if pos is None:
+                added += 1
+            elif current.reviews[pos] != review:
+                changed += 1
+        removed = len(current.reviews) - (len(reviews) - added)
+
+        stats, _ = current.stats.updated(reviews)
+        # Built aside, then published with one (atomic) attribute assignment
+        self._snapshot = self._build(reviews, stats)
+        return {"added": added, "changed": changed, "removed": removed}
+
+    @staticmethod
+    def _build(reviews: Sequence[Any], stats: ReviewStats) -> _Snapshot:
+        reviews = sorted(reviews, key=lambda r: r.id)
+        by_id = {r.id: pos for pos, r in enumerate(reviews)}
+
+        indexes: Dict[str, Dict[Any, List[int]]] = {field: {} for field in INDEXED_FIELDS}
+        for pos, review in enumerate(reviews):
+            for field in INDEXED_FIELDS:
+                indexes[field].setdefault(getattr(review, field), []).append(pos)
+
+        orders, ranks = {}, {}
+        for field in SORT_FIELDS:
+            values = [getattr(r, field) for r in reviews]
+            # Missing values (e.g. no "since") sort first; ties keep id order
+            order = sorted(range(len(reviews)), key=lambda pos: _sort_key(values[pos]))
+            rank = [0] * len(reviews)
+            for i, pos in enumerate(order):
+                rank[pos] = i
+            orders[field], ranks[field] = order, rank
+
+        return _Snapshot(reviews, by_id, indexes, ranks, orders, stats)
+
+    # ─── reading ──────────────────────────────────────────────────────────────
+    @property
+    def stats(self) -> ReviewStats:
+        """Aggregates over the current reviews."""
+        return self._snapshot.stats
+
+    @property
+    def reviews(self) -> List[Any]:
+        """All reviews, ordered by id."""
+        return self._snapshot.reviews
+
+    def __len__(self) -> int:
+        return len(self._snapshot.reviews)
+
+    def get(self, review_id: int) -> Optional[Any]:
+        snapshot = self._snapshot
+        pos = snapshot.by_id.get(review_id)
+        return None if pos is None else snapshot.reviews[pos]
+
+    def values(self, field: str) -> List[Any]:
+        """Distinct values of an indexed field, e.g. every location."""
+        return [value for value in self._snapshot.indexes[field] if value is not None]
+
+    def query(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: str = "id",
+        descending: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[int, List[Any]]:
+        """
+        Reviews matching every `filters` entry (field → exact value; None
+        values are ignored), sorted by `sort`, as (total matches, page).
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by '{sort}'")
+        snapshot = self._snapshot
+        active = {field: value for field, value in (filters or {}).items() if value is not None}
+
+        if not active:
+            order = snapshot.orders[sort]
+            total = len(order)
+            if descending:
+                # Slice the page straight out of the ascending order
+                stop = total - offset
+                start = 0 if limit is None else max(0, stop - limit)
+                return total, [snapshot.reviews[pos] for pos in reversed(order[start:max(0, stop)])]
+        else:
+            postings = []
+            for field, value in active.items():
+                if field not in INDEXED_FIELDS:
+                    raise ValueError(f"Cannot filter by '{field}'")
+                posting = snapshot.indexes[field].get(value)
+                if not posting:
+                    return 0, []
+                postings.append(posting)
+            postings.sort(key=len)
+            matches = set(postings[0]).intersection(*postings[1:]) if len(postings) > 1 else postings[0]
+            order = sorted(matches, key=snapshot.ranks[sort].__getitem__, reverse=descending)
+            total = len(order)
+
+        end = None if limit is None else offset + limit
+        return total, [snapshot.reviews[pos] for pos in order[offset:end]]
@@ -1,20 +1,47 @@
 # app/core/sentiment.py
 
-from transformers.pipelines import pipeline
+import os
 from enum import Enum
+from typing import List
+from backend.core.providers import LazyProvider
 
 class SentimentEnum(str, Enum):
     POSITIVE = "Positive"
     NEUTRAL = "Neutral"
     NEGATIVE = "Negative"
 
-# Load the pipeline once at import time
+SENTIMENT_MODEL = "nlptown/bert-base-multilingual-uncased-sentiment"
+
+# Number of reviews per forward pass in classify_sentiment_batch()
+DEFAULT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
+
+
+def _load_sentiment_pipeline():
+    from transformers.pipelines import pipeline
+    return pipeline(
+        "sentiment-analysis",
+        model=SENTIMENT_MODEL,
+        return_all_scores=False
+    )
+
+# Load the pipeline once, on the first classification (not at import time)
 # The default model (multilingual 1–5 star) can be overridden via environment variable if desired.
-_sentiment_pipeline = pipeline(
-    "sentiment-analysis",
-    model="nlptown/bert-base-multilingual-uncased-sentiment",
-    return_all_scores=False
-)
+sentiment_provider = LazyProvider("sentiment", _load_sentiment_pipeline)
+
+
+def _label_to_sentiment(label: str) -> SentimentEnum:
+    """Map a star label such as "4 stars" to a SentimentEnum."""
+    try:
+        num = int(label.split()[0])  # get the integer 4
+    except:
+        num = 3  # fallback to Neutral
+
+    if num <= 2:
+        return SentimentEnum.NEGATIVE
+    elif num == 3:
+        return SentimentEnum.NEUTRAL
+    else:
+        return SentimentEnum.POSITIVE
 
 def classify_sentiment(text: str) -> SentimentEnum:
     """
@@ -29,16 +56,49 @@ def classify_sentiment(text: str) -> SentimentEnum:
 
     # Truncate to 512 characters so we don't exceed the model limit
     snippet = text[:512]
-    result = _sentiment_pipeline(snippet)[0]  # e.g. { "label": "4 stars", "score": 0.95 }
-    label = result["label"]  # "4 stars"
-    try:
-        num = int(label.split()[0])  # get the integer 4
-    except:
-        num = 3  # fallback to Neutral
+    result = sentiment_provider.get()(snippet)[0]  # e.g. { "label": "4 stars", "score": 0.95 }
+    return _label_to_sentiment(result["label"])  # e.g. "4 stars"
 
-    if num <= 2:
-        return SentimentEnum.NEGATIVE
-    elif num == 3:
-        return SentimentEnum.NEUTRAL
-    else:
-        return SentimentEnum.POSITIVE
+
+def classify_sentiment_batch(texts: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> List[SentimentEnum]:
+    """
+    Batched version of classify_sentiment(); returns one label per input, in order.
+
+    Reviews are sorted by length and cut into batches of `batch_size`, and each
+    batch is padded only to its own longest review, so short reviews don't pay
+    for long ones. Empty texts are NEUTRAL without touching the model.
+    """
+    results: List[SentimentEnum] = [SentimentEnum.NEUTRAL] * len(texts)
+
+    # Same 512-character cut as classify_sentiment()
+    snippets = [(i, t[:512]) for i, t in enumerate(texts) if t]
+    if not snippets:
+        return results
+
+    import torch
+
+    sentiment_pipeline = sentiment_provider.get()
+    tokenizer = sentiment_pipeline.tokenizer
+    model = sentiment_pipeline.model
+    id2label = model.config.id2label
+
+    batch_size = max(1, batch_size)
+
+    # Group reviews of similar length together to minimise padding
+    snippets.sort(key=lambda item: len(item[1]))
+
+    with torch.inference_mode():
+        for start in range(0, len(snippets), batch_size):
+            batch = snippets[start:start + batch_size]
+            encoded = tokenizer(
+                [text for _, text in batch],
+                padding="longest",   # dynamic padding per batch
+                truncation=True,
+                max_length=512,
+                return_tensors="pt",
+            ).to(model.device)
+            predictions = model(**encoded).logits.argmax(dim=-1).tolist()
+            for (idx, _), pred in zip(batch, predictions):
+                results[idx] = _label_to_sentiment(id2label[pred])
+
+    return results
@@ -0,0 +1,96 @@
+# backend/core/sentiment_cache.py
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from backend.core.sentiment import SentimentEnum
+
+
+def review_key(model_name: str, text: str) -> str:
+    """Content hash identifying one (model, review text) classification."""
+    h = hashlib.sha256()
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\0")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+class SentimentCache:
+    """
+    On-disk cache of sentiment labels, stored in a small SQLite table.
+
+    Rows are keyed by review_key(model, text), so editing a review or switching
+    the model simply misses the cache; stale rows are harmless.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sentiment ("
+            " key TEXT PRIMARY KEY,"
+            " label TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, SentimentEnum]:
+        """Return {key: label} for the keys that are cached."""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, SentimentEnum] = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, label FROM sentiment WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, label in rows:
+                    try:
+                        found[key] = SentimentEnum(label)
+                    except ValueError:
+                        continue
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, SentimentEnum]]) -> None:
+        """Store (key, label) pairs, replacing any existing rows."""
+        rows = [(key, label.value) for key, label in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sentiment (key, label) VALUES (?, ?)", rows
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def classify_with_cache(texts: List[str], cache: SentimentCache, model_name: str, classify_batch) -> List[SentimentEnum]:
+    """
+    Return one label per text, running `classify_batch` only on texts that are
+    not in `cache` yet and storing their results for the next run.
+    """
+    keys = [review_key(model_name, t) for t in texts]
+    cached = cache.get_many(keys)
+
+    # Classify each distinct uncached text once
+    missing: Dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        if key not in cached and key not in missing:
+            missing[key] = text
+
+    if missing:
+        labels = classify_batch(list(missing.values()))
+        fresh = dict(zip(missing.keys(), labels))
+        cache.put_many(fresh.items())
+        cached.update(fresh)
+
+    print(f"Sentiment cache: {len(texts) - len(missing)} hits, {len(missing)} classified.")
+    return [cached[key] for key in keys]
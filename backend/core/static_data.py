@@ -0,0 +1,101 @@
+# backend/core/static_data.py
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+
+class StaticFile(NamedTuple):
+    """One parsed JSON file plus its serialized response body and ETag."""
+    data: Any
+    body: bytes
+    etag: str
+    signature: Tuple[int, int]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value covers `etag`."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class StaticDataRepository:
+    """
+    Read-mostly JSON data files (bank profile data, reviews, star ratings,
+    voting), loaded once and kept in memory.
+
+    Each file is parsed once, serialized once into a response body and
+    hashed into an ETag. The file's (mtime, size) is checked at most every
+    `check_interval` seconds, so a burst of requests does no disk I/O at all,
+    and an edited file is picked up shortly after it changes. If a changed
+    file fails to parse, the last good copy keeps being served.
+    """
+
+    def __init__(self, check_interval: float = 2.0):
+        self.check_interval = check_interval
+        self._files: Dict[str, StaticFile] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path) -> Optional[StaticFile]:
+        """The cached file, reloaded if it changed; None if it doesn't exist."""
+        key = str(Path(path).resolve())
+        entry = self._files.get(key)
+        now = time.monotonic()
+        if entry is not None and now - self._checked_at.get(key, 0.0) < self.check_interval:
+            return entry
+
+        with self._lock:
+            entry = self._files.get(key)
+            if entry is not None and now - self._checked_at.get(key, 0.0) < self.check_interval:
+                return entry
+            try:
+                st = os.stat(key)
+            except FileNotFoundError:
+                self._files.pop(key, None)
+                self._checked_at.pop(key, None)
+                return None
+            signature = (st.st_mtime_ns, st.st_size)
+            if entry is None or entry.signature != signature:
+                try:
+                    entry = self._load(key, signature)
+                except ValueError:
+                    if entry is None:
+                        raise
+                    # Probably caught mid-write; keep the last good copy
+                self._files[key] = entry
+            self._checked_at[key] = now
+            return entry
+
+    def load(self, path, default: Any = None) -> Any:
+        """Parsed contents of `path`, or `default` if the file doesn't exist."""
+        entry = self.get(path)
+        return default if entry is None else entry.data
+
+    def invalidate(self, path=None) -> None:
+        with self._lock:
+            if path is None:
+                self._files.clear()
+                self._checked_at.clear()
+            else:
+                key = str(Path(path).resolve())
+                self._files.pop(key, None)
+                self._checked_at.pop(key, None)
+
+    @staticmethod
+    def _load(path: str, signature: Tuple[int, int]) -> StaticFile:
+        with open(path, "rb") as f:
+            raw = f.read()
+        data = json.loads(raw)
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        return StaticFile(data, body, etag, signature)
+
+
+# Shared by the API and the prompt builder
+static_data = StaticDataRepository()
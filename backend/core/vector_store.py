@@ -0,0 +1,185 @@
+# backend/core/vector_store.py
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    # Heavy imports; loaded on first use so importing this module stays cheap.
+    from langchain_community.vectorstores import FAISS
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+logger = logging.getLogger("VectorStoreRegistry")
+
+# How embedders run: "torch" (HuggingFaceEmbeddings), or ONNX Runtime on CPU
+# with full-precision ("onnx") or int8-quantized ("onnx-int8") weights.
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+
+# Files written by FAISS.save_local(); a change to either means a new index.
+_INDEX_FILES = ("index.faiss", "index.pkl")
+
+
+def _index_signature(index_dir: Path) -> Optional[Tuple]:
+    """
+    Return (mtime_ns, size) for every index file, or None if the index
+    is missing or incomplete.
+    """
+    sig = []
+    for name in _INDEX_FILES:
+        try:
+            st = os.stat(index_dir / name)
+        except FileNotFoundError:
+            return None
+        sig.append((st.st_mtime_ns, st.st_size))
+    return tuple(sig)
+
+
+def index_version(index_dir) -> str:
+    """
+    Short string identifying the index currently on disk at `index_dir`
+    ("missing" if there is none). Changes whenever the index is rewritten.
+    """
+    sig = _index_signature(Path(index_dir))
+    if sig is None:
+        return "missing"
+    return "-".join(f"{mtime}:{size}" for mtime, size in sig)
+
+
+class _Entry:
+    """
+    One cached index. `current` is a (store, signature) tuple that is replaced
+    as a whole, so readers always see a store together with its own signature.
+    """
+
+    __slots__ = ("current", "checked_at", "lock")
+
+    def __init__(self):
+        self.current: Optional[Tuple["FAISS", Tuple]] = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+
+class VectorStoreRegistry:
+    """
+    Process-wide cache of FAISS vector stores.
+
+      - Each embedding model is loaded once and shared by every index that uses it.
+      - Each (index_dir, model) pair is deserialized once, on first use.
+      - When the index files on disk change, the next caller loads the new index
+        and swaps the reference in one assignment; readers holding the old store
+        keep using it until they are done.
+    """
+
+    def __init__(self, check_interval: float = 5.0, backend: str = EMBEDDING_BACKEND):
+        if backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{backend}'; expected one of {EMBEDDING_BACKENDS}")
+        # Minimum seconds between stat() checks of an index directory.
+        self.check_interval = check_interval
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._embedders: Dict[Tuple, "HuggingFaceEmbeddings"] = {}
+        self._embedder_locks: Dict[Tuple, threading.Lock] = {}
+        self._entries: Dict[Tuple, _Entry] = {}
+
+    # ─── embedders ────────────────────────────────────────────────────────────
+    def get_embedder(self, model_name: str, device: Optional[str] = None) -> "HuggingFaceEmbeddings":
+        """
+        Return the shared embedder for `model_name`, loading it on first use.
+        `device` only applies to the torch backend; ONNX runs on CPU.
+        """
+        key = (model_name, device, self.backend)
+        embedder = self._embedders.get(key)
+        if embedder is not None:
+            return embedder
+
+        with self._lock:
+            model_lock = self._embedder_locks.setdefault(key, threading.Lock())
+        with model_lock:
+            embedder = self._embedders.get(key)
+            if embedder is None:
+                logger.info(f"Loading embedder '{model_name}' ({self.backend})")
+                if self.backend == "torch":
+                    from langchain_huggingface import HuggingFaceEmbeddings
+                    model_kwargs = {"device": device} if device else {}
+                    embedder = HuggingFaceEmbeddings(model_name=model_name, model_kwargs=model_kwargs)
+                else:
+                    from backend.core.onnx_embedder import OnnxEmbeddings
+                    embedder = OnnxEmbeddings(model_name, quantize=self.backend == "onnx-int8")
+                self._embedders[key] = embedder
+        return embedder
+
+    # ─── vector stores ────────────────────────────────────────────────────────
+    def get(self, index_dir, model_name: str, device: Optional[str] = None) -> "FAISS":
+        """
+        Return the FAISS store for `index_dir` embedded with `model_name`.
+        Loads it on first call and reloads it if the files on disk changed.
+        """
+        index_dir = Path(index_dir).resolve()
+        key = (str(index_dir), model_name, device)
+
+        with self._lock:
+            entry = self._entries.setdefault(key, _Entry())
+
+        current = entry.current
+        now = time.monotonic()
+        if current is not None and now - entry.checked_at < self.check_interval:
+            return current[0]
+
+        signature = _index_signature(index_dir)
+        if current is not None and signature == current[1]:
+            entry.checked_at = now
+            return current[0]
+
+        # Only one thread (re)loads a given index; the others wait and reuse it.
+        with entry.lock:
+            current = entry.current
+            if current is not None and current[1] == signature:
+                entry.checked_at = now
+                return current[0]
+            if signature is None:
+                if current is not None:
+                    # Index removed or mid-write: keep serving the last good copy.
+                    logger.warning(f"FAISS index at '{index_dir}' is incomplete; keeping loaded copy.")
+                    entry.checked_at = now
+                    return current[0]
+                raise FileNotFoundError(f"No FAISS index found at {index_dir}")
+
+            from langchain_community.vectorstores import FAISS
+
+            embedder = self.get_embedder(model_name, device)
+            new_store = FAISS.load_local(
+                str(index_dir),
+                embeddings=embedder,
+                allow_dangerous_deserialization=True,
+            )
+            # nprobe / efSearch for IVF and HNSW indexes (see core/faiss_index.py)
+            from backend.core.faiss_index import apply_search_params
+            apply_search_params(new_store)
+            # Publish only once the load has fully succeeded.
+            entry.current = (new_store, signature)
+            entry.checked_at = now
+            action = "Reloaded" if current is not None else "Loaded"
+            logger.info(f"{action} FAISS index from '{index_dir}'.")
+            return new_store
+
+    def invalidate(self, index_dir=None) -> None:
+        """Drop cached stores (all of them, or just those for `index_dir`)."""
+        with self._lock:
+            if index_dir is None:
+                self._entries.clear()
+                return
+            target = str(Path(index_dir).resolve())
+            for key in [k for k in self._entries if k[0] == target]:
+                del self._entries[key]
+
+
+# Shared registry for the whole process
+registry = VectorStoreRegistry()
+
+
+def get_vector_store(index_dir, model_name: str, device: Optional[str] = None) -> "FAISS":
+    """Shortcut for `registry.get(...)`."""
+    return registry.get(index_dir, model_name, device)
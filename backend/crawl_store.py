@@ -0,0 +1,121 @@
+#  Description: Persistent crawl state for scrape_bop.py (conditional re-crawls).
+import json
+import sqlite3
+import hashlib
+from datetime import datetime
+from collections import Counter
+from typing import Iterable, Optional
+
+
+def lines_hash(lines: list[str]) -> str:
+    return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+class CrawlStore:
+    """
+    SQLite store of what the last crawl saw for every page: ETag,
+    Last-Modified, a hash of the extracted lines, the lines themselves and
+    the page's links. Lets a re-crawl send conditional requests and reuse
+    unchanged pages without downloading or parsing them again.
+
+    It also keeps, for every line, the number of stored pages containing it,
+    updated only for pages whose content changed, so boilerplate detection
+    doesn't need a pass over the whole corpus.
+    """
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url           TEXT PRIMARY KEY,
+                etag          TEXT,
+                last_modified TEXT,
+                content_hash  TEXT NOT NULL,
+                lines         TEXT NOT NULL,
+                links         TEXT NOT NULL,
+                crawled_at    TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS line_freq (
+                line  TEXT PRIMARY KEY,
+                pages INTEGER NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    # --- pages ---
+
+    def get(self, url: str) -> Optional[dict]:
+        row = self.conn.execute(
+            "SELECT etag, last_modified, content_hash, lines, links FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, content_hash, lines, links = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": content_hash,
+            "lines": json.loads(lines),
+            "links": json.loads(links),
+        }
+
+    def conditional_headers(self, url: str) -> dict:
+        """If-None-Match / If-Modified-Since headers for a page we've seen before."""
+        row = self.conn.execute("SELECT etag, last_modified FROM pages WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if row:
+            if row[0]:
+                headers["If-None-Match"] = row[0]
+            if row[1]:
+                headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def save(self, url: str, lines: list[str], links: list[str],
+             etag: Optional[str] = None, last_modified: Optional[str] = None) -> bool:
+        """Store a freshly downloaded page. Returns True if its content changed."""
+        new_hash = lines_hash(lines)
+        old = self.get(url)
+        changed = old is None or old["content_hash"] != new_hash
+        with self.conn:
+            if changed:
+                if old is not None:
+                    self._count_lines(old["lines"], -1)
+                self._count_lines(lines, +1)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, content_hash, lines, links, crawled_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, new_hash,
+                 json.dumps(lines, ensure_ascii=False), json.dumps(links, ensure_ascii=False),
+                 datetime.utcnow().isoformat()),
+            )
+        return changed
+
+    def prune(self, keep_urls: Iterable[str]) -> int:
+        """Forget pages not in `keep_urls` (gone from the site). Returns how many."""
+        keep = set(keep_urls)
+        stale = [url for (url,) in self.conn.execute("SELECT url FROM pages") if url not in keep]
+        with self.conn:
+            for url in stale:
+                old = self.get(url)
+                self._count_lines(old["lines"], -1)
+                self.conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+        return len(stale)
+
+    # --- boilerplate statistics ---
+
+    def line_frequencies(self) -> Counter:
+        """{line: number of stored pages containing it}"""
+        return Counter(dict(self.conn.execute("SELECT line, pages FROM line_freq")))
+
+    def _count_lines(self, lines: list[str], delta: int):
+        # Lines are already de-duplicated per page, so each counts once per page
+        self.conn.executemany(
+            "INSERT INTO line_freq (line, pages) VALUES (?, ?)"
+            " ON CONFLICT(line) DO UPDATE SET pages = pages + excluded.pages",
+            [(line, delta) for line in lines],
+        )
+        if delta < 0:
+            self.conn.execute("DELETE FROM line_freq WHERE pages <= 0")
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,400 @@
+# Description: Single-pass keyword extraction engine for the bank profile (used by test.py).
+#
+# The original extractors in test.py loop over every document × every keyword
+# and build a new regex each time; patterns like "[^\n.]*fee[^\n.]*" backtrack
+# over every line once per keyword. Here every keyword table is compiled once
+# at import into a single alternation regex (KeywordMatcher), so each document
+# is scanned once per table instead of once per keyword, and each document is
+# indexed once (line and sentence boundaries). The outputs match the original
+# functions (fees and rates come out in document order instead of the
+# arbitrary set order the originals produced).
+import os
+import re
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+
+# --- Keyword tables (shared with the reference implementations in test.py) ---
+
+FEE_KEYWORDS  = ["رسوم", "عمولة", "تكلفة", "fee", "charge", "commission"]
+RATE_KEYWORDS = ["فائدة", "نسبة", "rate", "interest", "margin"]
+
+DIGITAL_KEYWORDS = [
+    "تطبيق", "انترنت", "الكتروني", "رقمي", "موبايل", "بنكي", "app", "internet", "digital", "mobile", "online"
+]
+
+PALESTINIAN_CITIES = [
+    "رام الله", "غزة", "نابلس", "جنين", "طولكرم", "الخليل", "بيت لحم", "أريحا", "قلقيلية", "طوباس",
+    "سلفيت", "دير البلح", "خان يونس", "رفح", "البيرة", "النصيرات"
+]
+
+KNOWN_ENTITIES = {
+    "founders": ["هاشم عطا الشوا", "Hashim Atta Al-Shawa", "Hashim Al-Shawa", "المرحوم هاشم عطا الشوا"],
+    "staff": [
+        "هاشم الشوا", "محمود الشوا", "صقر النمري", "مها عوض", "نبيل قدومي",
+        "Hashim Al-Shawa", "Mahmoud Al-Shawa", "Saqer Al-Nimri", "Maha Awad", "Nabil Qaddumi",
+        "رئيس مجلس الإدارة", "المدير التنفيذي", "المدير المالي"
+    ],
+    "branches": [
+        "رام الله", "غزة", "نابلس", "جنين", "طولكرم", "الخليل", "بيت لحم", "أريحا", "قلقيلية",
+        "طوباس", "سلفيت", "دير البلح", "خان يونس", "رفح", "البيرة", "النصيرات", "الرمال",
+        "Ramallah", "Gaza", "Nablus", "Jenin", "Tulkarm", "Hebron", "Bethlehem", "Jericho", "Qalqilya"
+    ],
+    "csr_programs": [
+        "فلسطين في القلب", "Palestine in the Heart", "صندوق دعم التعليم", "Education Support Fund",
+        "المسؤولية الاجتماعية", "CSR", "مبادرات"
+    ],
+    "partners": [
+        "IFC", "EBRD", "PROPARCO", "FISEA+", "SANAD", "TechnoPark",
+        "مؤسسة التمويل الدولية", "البنك الأوروبي لإعادة الإعمار والتنمية",
+        "الاتحاد الأوروبي", "European Union", "سلطة النقد الفلسطينية"
+    ],
+    "awards": [
+        "Best Bank in Financial Inclusion", "أفضل بنك في الشمول المالي",
+        "جائزة", "award", "تكريم", "recognition"
+    ],
+    "contact_info": [
+        "1700150150", "www.bankofpalestine.com", "البريد الالكتروني", "email",
+        "رقم الهاتف", "phone number", "العنوان", "address"
+    ]
+}
+
+SERVICE_KEYWORDS = {
+    "accounts": ["حساب", "الحسابات", "وديعة", "الودائع", "توفير", "account", "deposit", "savings"],
+    "loans": ["قرض", "القروض", "تمويل", "الرهن", "loan", "mortgage", "financing"],
+    "cards": ["بطاقة", "البطاقات", "فيزا", "ماستركارد", "card", "visa", "mastercard"],
+    "digital_services": ["الكتروني", "رقمي", "انترنت", "موبايل", "تطبيق", "digital", "online", "mobile", "app"],
+    "investment_products": ["استثمار", "الأوراق المالية", "صندوق", "investment", "securities", "fund"],
+    "transfer_services": ["حوالة", "تحويل", "سويفت", "transfer", "swift", "remittance"]
+}
+
+BRANCH_WORD = "فرع"
+
+# Below this many pages, starting worker processes costs more than it saves
+MIN_PARALLEL_DOCS = 64
+
+# --- Precompiled patterns ---
+
+SENTENCE_DELIM_RE  = re.compile(r"[\n.]")
+BRANCH_CODE_RE     = re.compile(r"(\d{4})\s*-\s*([^\n]+)")
+BULLET_RE          = re.compile(r"(?:•|\-|\*)\s*([^\n•\-\*]+)")
+SECTION_RE         = re.compile(r"([^\n]+)\n([^\n]+(?:\n[^\n]+)*)")
+SECTION_FEATURE_RE = re.compile(r"(?:•|\-|\*|[0-9]+\.)\s*([^\n•\-\*]+)")
+
+
+# --- Helpers ---
+
+class KeywordMatcher:
+    """
+    Finds every occurrence of any of a set of literal keywords in one regex
+    pass. Alternatives are ordered shortest first, so at each position the
+    regex reports the shortest keyword starting there; longer keywords that
+    extend it are checked with startswith.
+    """
+
+    def __init__(self, keywords):
+        keywords = sorted(set(keywords), key=len)
+        self.regex = re.compile("|".join(map(re.escape, keywords)))
+        self._longer = {
+            keyword: [other for other in keywords if len(other) > len(keyword) and other.startswith(keyword)]
+            for keyword in keywords
+        }
+
+    def finditer(self, text: str):
+        """Yield (position, keyword) for every occurrence, overlapping ones included."""
+        search, pos = self.regex.search, 0
+        while True:
+            m = search(text, pos)
+            if m is None:
+                return
+            start, keyword = m.start(), m.group()
+            yield start, keyword
+            for longer in self._longer[keyword]:
+                if text.startswith(longer, start):
+                    yield start, longer
+            pos = start + 1
+
+    def found_in(self, text: str) -> set:
+        """The keywords that occur in text."""
+        return {keyword for _, keyword in self.finditer(text)}
+
+
+FEE_RATE_MATCHER = KeywordMatcher(FEE_KEYWORDS + RATE_KEYWORDS)
+FEE_RATE_CATEGORY = {
+    **{keyword: "interest_rates" for keyword in RATE_KEYWORDS},
+    **{keyword: "fees" for keyword in FEE_KEYWORDS},
+}
+DIGITAL_MATCHER = KeywordMatcher(DIGITAL_KEYWORDS)
+CITY_MATCHER    = KeywordMatcher(PALESTINIAN_CITIES)
+ENTITY_MATCHER  = KeywordMatcher(entity for entities in KNOWN_ENTITIES.values() for entity in entities)
+SERVICE_MATCHER = KeywordMatcher(keyword for keywords in SERVICE_KEYWORDS.values() for keyword in keywords)
+
+
+class DocumentIndex:
+    """Line and sentence boundaries of one document, computed once."""
+
+    __slots__ = ("content", "lines", "line_starts", "delims")
+
+    def __init__(self, content: str):
+        self.content = content
+        self.lines = content.split("\n")
+        starts, offset = [], 0
+        for line in self.lines:
+            starts.append(offset)
+            offset += len(line) + 1
+        self.line_starts = starts
+        self.delims = [m.start() for m in SENTENCE_DELIM_RE.finditer(content)]
+
+    def line_of(self, pos: int) -> int:
+        return bisect_right(self.line_starts, pos) - 1
+
+    def segment_at(self, pos: int) -> str:
+        """The run of text between '\\n'/'.' delimiters that contains `pos`."""
+        i = bisect_right(self.delims, pos)
+        start = self.delims[i - 1] + 1 if i else 0
+        end = self.delims[i] if i < len(self.delims) else len(self.content)
+        return self.content[start:end]
+
+
+# --- Per-document extractors ---
+
+def fees_and_rates_in(content: str, index: DocumentIndex = None) -> dict:
+    """
+    Sentences (runs between '\\n' and '.') that mention a fee or rate keyword,
+    in document order. Same matches as re.findall("[^\\n.]*<kw>[^\\n.]*").
+    """
+    result = {"fees": {}, "interest_rates": {}}
+    index = index or DocumentIndex(content)
+    for pos, keyword in FEE_RATE_MATCHER.finditer(content):
+        segment = index.segment_at(pos)
+        if segment.strip() and len(segment) < 200:  # Reasonable length
+            result[FEE_RATE_CATEGORY[keyword]][segment.strip()] = None
+    return {category: list(found) for category, found in result.items()}
+
+
+def digital_features_in(content: str, index: DocumentIndex = None) -> list:
+    """
+    Bullet points and keyword sections of a page about digital services;
+    same output, in the same order, as the loop body of
+    test.extract_digital_features (before its final de-duplication).
+    """
+    if DIGITAL_MATCHER.regex.search(content.lower()) is None:
+        return []
+
+    features = []
+    # Extract bullet points which often describe features
+    for feature in BULLET_RE.findall(content):
+        if feature.strip() and len(feature) < 200:  # Reasonable length
+            features.append(feature.strip())
+
+    index = index or DocumentIndex(content)
+    lines, starts = index.lines, index.line_starts
+    section_cache = {}
+
+    # Equivalent of re.findall("([^\\n]+<kw>[^\\n]+)\\n([^\\n]+(?:\\n[^\\n]+)*)"):
+    # a title line with the keyword strictly inside it, followed by the block
+    # of non-empty lines after it. Title lines for every keyword come from one
+    # scan; sections are still emitted keyword by keyword, as the original did.
+    title_lines = {keyword: set() for keyword in DIGITAL_KEYWORDS}
+    for pos, keyword in DIGITAL_MATCHER.finditer(content):
+        i = index.line_of(pos)
+        if pos > starts[i] and pos + len(keyword) < starts[i] + len(lines[i]):
+            title_lines[keyword].add(i)
+
+    for keyword in DIGITAL_KEYWORDS:
+
+        cursor = 0
+        for i in sorted(title_lines[keyword]):
+            if i < cursor or i + 1 >= len(lines) or not lines[i + 1]:
+                continue
+            j = i + 1
+            while j < len(lines) and lines[j]:
+                j += 1
+            features.append(lines[i].strip())
+
+            if i + 1 not in section_cache:
+                section_content = "\n".join(lines[i + 1:j])
+                section_cache[i + 1] = [
+                    f"  - {feat.strip()}"
+                    for feat in SECTION_FEATURE_RE.findall(section_content)
+                    if feat.strip() and len(feat) < 200
+                ]
+            features.extend(section_cache[i + 1])
+            cursor = j
+    return features
+
+
+def bank_services_in(content: str) -> dict:
+    """
+    {category: [service names and "name: feature" lines]} for the sections
+    of a page whose title mentions a service keyword; same output, in the
+    same order, as the loop body of test.extract_bank_services.
+    """
+    services = {category: {} for category in SERVICE_KEYWORDS}
+    for title, section in SECTION_RE.findall(content):
+        found = SERVICE_MATCHER.found_in(title.lower())
+        if not found:
+            continue
+        service_name = title.strip()
+        features = None
+        for category, keywords in SERVICE_KEYWORDS.items():
+            if not any(keyword in found for keyword in keywords):
+                continue
+            if features is None:
+                features = [f"{service_name}: {feature.strip()}" for feature in BULLET_RE.findall(section)]
+            services[category][service_name] = None
+            services[category].update(dict.fromkeys(features))
+    return {category: list(found) for category, found in services.items()}
+
+
+def known_entities_in(text: str) -> dict:
+    """{category: [entities mentioned in text]} in table order."""
+    found = ENTITY_MATCHER.found_in(text)
+    return {
+        category: [entity for entity in entities if entity in found]
+        for category, entities in KNOWN_ENTITIES.items()
+    }
+
+
+def branch_locations_in(content: str) -> set:
+    """Branch names from IBAN branch codes and "فرع <city>" mentions."""
+    branches = set()
+
+    # Look for branch codes in IBAN generator page
+    for code, name in BRANCH_CODE_RE.findall(content):
+        if name.strip():
+            branches.add(f"{name.strip()} ({code})")
+
+    if BRANCH_WORD not in content:
+        return branches
+
+    # Look for city names near the word "فرع" (branch)
+    next_allowed = {}
+    for idx, city in CITY_MATCHER.finditer(content):
+        # Occurrences of the same city don't overlap (str.find-style scan)
+        if idx < next_allowed.get(city, 0):
+            continue
+        next_allowed[city] = idx + len(city)
+        context = content[max(0, idx - 30):min(len(content), idx + 30)]
+        if BRANCH_WORD not in context:
+            continue
+        if f"{BRANCH_WORD} {city}" in context:
+            branches.add(f"{BRANCH_WORD} {city}")
+        elif f"{city} {BRANCH_WORD}" in context:
+            branches.add(f"{city} {BRANCH_WORD}")
+        else:
+            branches.add(city)
+    return branches
+
+
+# --- Corpus-level API (drop-in replacements for the test.py functions) ---
+
+def extract_fees_and_rates(data) -> dict:
+    fees, rates = {}, {}
+    for entry in data:
+        found = fees_and_rates_in(entry.get("content", ""))
+        fees.update(dict.fromkeys(found["fees"]))
+        rates.update(dict.fromkeys(found["interest_rates"]))
+    return {"fees": list(fees), "interest_rates": list(rates)}
+
+
+def extract_digital_features(data) -> list:
+    features = {}
+    for entry in data:
+        # Remove duplicates while preserving order
+        features.update(dict.fromkeys(digital_features_in(entry.get("content", ""))))
+    return list(features)
+
+
+def extract_bank_services(documents) -> dict:
+    services = {category: {} for category in SERVICE_KEYWORDS}
+    for doc in documents:
+        text = doc.page_content if hasattr(doc, "page_content") else doc.get("content", "")
+        # Skip non-Arabic content if specifically marked
+        if hasattr(doc, "metadata") and doc.metadata.get("lang") != "ar":
+            continue
+        for category, found in bank_services_in(text).items():
+            services[category].update(dict.fromkeys(found))
+    return {category: list(found) for category, found in services.items()}
+
+
+def extract_known_entities(documents) -> dict:
+    results = {category: {} for category in KNOWN_ENTITIES}
+    for doc in documents:
+        text = doc.page_content if hasattr(doc, "page_content") else doc
+        for category, entities in known_entities_in(text).items():
+            results[category].update(dict.fromkeys(entities))
+    return {category: list(found) for category, found in results.items()}
+
+
+def extract_branch_locations(data) -> list:
+    branches = set()
+    for entry in data:
+        branches |= branch_locations_in(entry.get("content", ""))
+    return sorted(branches)
+
+
+# --- Whole-profile extraction (parallel) ---
+
+def extract_document(content: str, services: bool = True) -> dict:
+    """
+    Everything the profile needs from one page; runs in a worker process.
+    With `services` False the page is left out of the bank services.
+    """
+    index = DocumentIndex(content)
+    found = fees_and_rates_in(content, index)
+    return {
+        "branch_locations": branch_locations_in(content),
+        "bank_services": bank_services_in(content) if services else {},
+        "fees": found["fees"],
+        "interest_rates": found["interest_rates"],
+        "digital_features": digital_features_in(content, index),
+        "known_entities": known_entities_in(content),
+    }
+
+
+def merge_documents(results) -> dict:
+    """
+    Combine per-page results in corpus order, de-duplicating with dicts so
+    the merge is linear and gives the same output as the serial functions.
+    """
+    branches = set()
+    fees, rates, digital = {}, {}, {}
+    services = {category: {} for category in SERVICE_KEYWORDS}
+    entities = {category: {} for category in KNOWN_ENTITIES}
+    for result in results:
+        branches |= result["branch_locations"]
+        for category, found in result["bank_services"].items():
+            services[category].update(dict.fromkeys(found))
+        fees.update(dict.fromkeys(result["fees"]))
+        rates.update(dict.fromkeys(result["interest_rates"]))
+        digital.update(dict.fromkeys(result["digital_features"]))
+        for category, found in result["known_entities"].items():
+            entities[category].update(dict.fromkeys(found))
+    return {
+        "branch_locations": sorted(branches),
+        "bank_services": {category: list(found) for category, found in services.items()},
+        "fees": list(fees),
+        "interest_rates": list(rates),
+        "digital_features": list(digital),
+        "known_entities": {category: list(found) for category, found in entities.items()},
+    }
+
+
+def extract_profile(contents, workers: int = None, langs=None) -> dict:
+    """
+    Run extract_document() over every page, fanned out over `workers`
+    processes (default: all cores), and merge the results. pool.map returns
+    results in input order, so the output doesn't depend on scheduling.
+    With `langs` (one per page), only "ar" pages count towards the bank
+    services, as in test.extract_bank_services.
+    """
+    contents = list(contents)
+    services = [True] * len(contents) if langs is None else [lang == "ar" for lang in langs]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(contents) < MIN_PARALLEL_DOCS:
+        return merge_documents(map(extract_document, contents, services))
+
+    # A few chunks per worker keeps them busy without paying IPC per page
+    chunksize = max(1, len(contents) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return merge_documents(pool.map(extract_document, contents, services, chunksize=chunksize))
@@ -0,0 +1,197 @@
+# Description: Batched CAMeL-BERT NER over the scraped corpus (used by test.py).
+import os
+import json
+import sqlite3
+import hashlib
+from pathlib import Path
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from extraction_engine import KNOWN_ENTITIES
+
+NER_MODEL = "CAMeL-Lab/bert-base-arabic-camelbert-ca-ner"
+
+# Windows per forward pass, and window size/overlap in tokens. BERT takes 512
+# tokens including [CLS]/[SEP]; keep a margin since a window is re-tokenized.
+NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", "16"))
+WINDOW_TOKENS  = 500
+WINDOW_OVERLAP = 64
+
+# Entities below this confidence are left out of the profile (they stay cached)
+NER_MIN_SCORE = float(os.getenv("NER_MIN_SCORE", "0.8"))
+
+# Bumped when the post-processing of model output changes, so cached pages
+# are re-run instead of keeping results in the old shape
+CACHE_VERSION = 2
+
+# CAMeL NER labels → profile categories (MISC is too noisy to be useful)
+NER_CATEGORIES = {"PERS": "people", "ORG": "organizations", "LOC": "locations"}
+
+
+def content_key(model_name: str, text: str) -> str:
+    """Content hash identifying one (model, page text) NER run."""
+    h = hashlib.sha256()
+    h.update(f"{CACHE_VERSION}\0{model_name}".encode("utf-8"))
+    h.update(b"\0")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+class NERCache:
+    """
+    SQLite cache of the entities found in each page, keyed by
+    content_key(model, text), so re-running the extraction only sends new or
+    edited pages through the model.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entities ("
+            " key TEXT PRIMARY KEY,"
+            " entities TEXT NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[dict]]:
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, entities FROM entities WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            found.update((key, json.loads(entities)) for key, entities in rows)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, List[dict]]]) -> None:
+        rows = [(key, json.dumps(entities, ensure_ascii=False)) for key, entities in items]
+        if rows:
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO entities (key, entities) VALUES (?, ?)", rows)
+
+    def close(self):
+        self.conn.close()
+
+
+def split_windows(tokenizer, text: str, max_tokens: int = WINDOW_TOKENS,
+                  overlap: int = WINDOW_OVERLAP) -> List[Tuple[int, str]]:
+    """
+    Cut `text` into (char_offset, window) pieces of at most `max_tokens`
+    tokens, consecutive windows sharing `overlap` tokens so an entity on a
+    boundary is seen whole by at least one of them.
+    """
+    offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+    if len(offsets) <= max_tokens:
+        return [(0, text)]
+
+    windows = []
+    step = max(1, max_tokens - overlap)
+    for start in range(0, len(offsets), step):
+        end = min(start + max_tokens, len(offsets))
+        char_start, char_end = offsets[start][0], offsets[end - 1][1]
+        windows.append((char_start, text[char_start:char_end]))
+        if end == len(offsets):
+            break
+    return windows
+
+
+def merge_spans(spans: Dict[tuple, float]) -> List[Tuple[int, int, str, float]]:
+    """
+    Collapse overlapping (start, end, label) spans of the same label into
+    the longest one, in document order. An entity cut by a window edge is
+    found truncated in one window and whole in the next; only the whole one
+    is kept, with its own score.
+    """
+    merged: List[Tuple[int, int, str, float]] = []
+    last_by_label: Dict[str, int] = {}
+    for (start, end, label), score in sorted(spans.items()):
+        i = last_by_label.get(label)
+        if i is not None and start < merged[i][1]:
+            prev_start, prev_end, _, prev_score = merged[i]
+            if (end - start, score) > (prev_end - prev_start, prev_score):
+                merged[i] = (start, end, label, score)
+            else:
+                continue
+        else:
+            merged.append((start, end, label, score))
+            last_by_label[label] = len(merged) - 1
+    return merged
+
+
+def extract_named_entities(texts: List[str], ner, cache: NERCache = None,
+                           batch_size: int = NER_BATCH_SIZE) -> List[List[dict]]:
+    """
+    Run the token-classification pipeline `ner` over every page and return,
+    per page, its entities as {"text", "label", "score"} in document order.
+
+    Pages already in `cache` (and duplicate pages) are not run again. The
+    rest are cut into windows, sorted by length and fed to the pipeline in
+    batches of `batch_size`, so each batch is padded only to its own longest
+    window. Entities found in overlapping windows are kept once, at their
+    longest extent (see merge_spans).
+    """
+    keys = [content_key(NER_MODEL, t) for t in texts]
+    cached = cache.get_many(keys) if cache else {}
+    todo = {key: text for key, text in zip(keys, texts) if key not in cached and text.strip()}
+
+    windows = [
+        (key, offset, window)
+        for key, text in todo.items()
+        for offset, window in split_windows(ner.tokenizer, text)
+    ]
+    print(f"NER: {len(cached)} pages cached, {len(todo)} to process ({len(windows)} windows)")
+
+    # Group windows of similar length together to minimise padding
+    windows.sort(key=lambda w: len(w[2]))
+    outputs = ner([w[2] for w in windows], batch_size=max(1, batch_size)) if windows else []
+
+    spans: Dict[str, Dict[tuple, float]] = {key: {} for key in todo}
+    for (key, offset, _), entities in zip(windows, outputs):
+        for ent in entities:
+            span = (offset + ent["start"], offset + ent["end"], ent["entity_group"])
+            spans[key][span] = max(spans[key].get(span, 0.0), float(ent["score"]))
+
+    fresh = {}
+    for key, found in spans.items():
+        text = todo[key]
+        fresh[key] = [
+            {"text": text[start:end].strip(), "label": label, "score": round(score, 4)}
+            for start, end, label, score in merge_spans(found)
+        ]
+    if cache:
+        cache.put_many(fresh.items())
+
+    results = {**cached, **fresh}
+    return [results.get(key, []) for key in keys]
+
+
+def merge_with_known_entities(known_entities: dict, page_entities: List[List[dict]],
+                              min_score: float = NER_MIN_SCORE) -> dict:
+    """
+    Add NER people, organizations and locations to the known-entity results.
+    Names already covered by the curated KNOWN_ENTITIES lists are skipped;
+    the rest are ordered by the number of pages mentioning them.
+    """
+    curated = {entity for entities in KNOWN_ENTITIES.values() for entity in entities}
+    counts = {category: Counter() for category in NER_CATEGORIES.values()}
+
+    for entities in page_entities:
+        on_page = set()
+        for ent in entities:
+            category = NER_CATEGORIES.get(ent["label"])
+            text = ent["text"]
+            if category is None or ent["score"] < min_score or len(text) < 2 or text in curated:
+                continue
+            if (category, text) not in on_page:
+                on_page.add((category, text))
+                counts[category][text] += 1
+
+    merged = dict(known_entities)
+    for category, counter in counts.items():
+        merged[category] = [text for text, _ in counter.most_common()]
+    return merged
@@ -1,15 +1,17 @@
 # -*- coding: utf-8 -*-
 
+import asyncio
+import hashlib
 import json
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from huggingface_hub import login
 import os
-from langchain.schema import HumanMessage, SystemMessage
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+import threading
 from pathlib import Path
-from langchain.schema.document import Document
 from dotenv import load_dotenv
+from backend.core.providers import LazyProvider
+from backend.core.vector_store import registry, get_vector_store, index_version
+from backend.core.incremental_index import IncrementalIndexer, IndexEntry
+from backend.core.corpus import iter_corpus, resolve_corpus_path
+from backend.core.static_data import static_data
 
 
 BANK_PROFILE_DOCUMENT = """
@@ -53,21 +55,33 @@ BANK_PROFILE_DOCUMENT = """
 
 env_path = Path(__file__).resolve().parent.parent / ".env"
 load_dotenv(dotenv_path=env_path)
-token = os.getenv("LLAMA_KEY")
-if not token:
-    raise RuntimeError("LLAMA_KEY is not set in your .env")
 
-# 3) export for Hugging Face & login
-os.environ["HUGGINGFACEHUB_API_TOKEN"] = token
-login(token)
+
+def _hf_login():
+    """Check LLAMA_KEY, export it for Hugging Face and log in (network call)."""
+    from huggingface_hub import login
+
+    token = os.getenv("LLAMA_KEY")
+    if not token:
+        raise RuntimeError("LLAMA_KEY is not set in your .env")
+
+    # 3) export for Hugging Face & login
+    os.environ["HUGGINGFACEHUB_API_TOKEN"] = token
+    login(token)
+    return token
+
+# Logged in on the first LLM call rather than at import time
+hf_login_provider = LazyProvider("hf_login", _hf_login)
 
 
 
 
 
 BACKEND_DIR = Path(__file__).resolve().parent
-DATA_PATH = BACKEND_DIR / "scraped_data" / "bop_website_cleaned.json" # Your institution data
+DATA_PATH = BACKEND_DIR / "scraped_data" / "bop_website_cleaned.jsonl" # Your institution data
 INDEX_DIR = BACKEND_DIR / "faiss_index2"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+_index_build_lock = threading.Lock()
 
 
 def load_json(path):
@@ -78,24 +92,30 @@ def load_json(path):
 # Add this function to create a new FAISS index if needed
 def create_faiss_index(documents=None, index_dir=None):
     """
-    Create a new FAISS index from documents.
+    Create or incrementally update the FAISS index from documents.
+    Only new or changed documents are embedded; documents no longer present
+    are removed (see core/incremental_index.py).
     
     Args:
-        documents: List of documents or path to JSON file
+        documents: Iterable of documents or path to a JSONL/JSON corpus file
         index_dir: Directory to save the index
+
+    Returns the updated vector store, or None if it was already up to date.
     """
     if index_dir is None:
         index_dir = str(INDEX_DIR)
     
+    from langchain.schema.document import Document
+
     # Process documents based on input type
-    if documents is None and DATA_PATH.exists():
-        # Try to load from default path
+    if documents is None and resolve_corpus_path(DATA_PATH).exists():
+        # Stream from default path
         print(f"Loading documents from {DATA_PATH}")
-        documents = load_json(str(DATA_PATH))
-    elif isinstance(documents, str) and os.path.exists(documents):
-        # Load from provided path
+        documents = iter_corpus(DATA_PATH)
+    elif isinstance(documents, (str, Path)) and os.path.exists(documents):
+        # Stream from provided path
         print(f"Loading documents from {documents}")
-        documents = load_json(documents)
+        documents = iter_corpus(documents)
     elif not documents:
         # Create sample documents if no source is available
         print("No documents provided. Creating sample documents.")
@@ -107,11 +127,11 @@ def create_faiss_index(documents=None, index_dir=None):
         ]
     
     # Prepare documents for embedding
-    texts = []
-    metadatas = []
+    entries = []
+    seen_keys = {}
     
     # Handle different document formats
-    if isinstance(documents, list):
+    if not isinstance(documents, (str, bytes, dict)):
         for doc in documents:
             if isinstance(doc, dict) and "content" in doc:
                 # Format from your app.py example
@@ -139,41 +159,36 @@ def create_faiss_index(documents=None, index_dir=None):
                 continue
                 
             if content:
-                texts.append(content)
-                metadatas.append(metadata)
+                # Key documents by source; repeated sources get a running suffix
+                source = str(metadata.get("source", "unknown"))
+                seen_keys[source] = seen_keys.get(source, 0) + 1
+                key = source if seen_keys[source] == 1 else f"{source}#{seen_keys[source]}"
+                entries.append(IndexEntry(key, [content], [metadata]))
     
-    if not texts:
+    if not entries:
         raise ValueError("No valid documents found to index")
     
-    # Create embeddings - using the same model as in test.py
-    print("Creating embeddings with sentence-transformers/all-MiniLM-L6-v2")
-    embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    
-    # Build FAISS index
-    print(f"Building FAISS index with {len(texts)} documents...")
-    vectorstore = FAISS.from_texts(texts, embedding=embedding_model, metadatas=metadatas)
+    # Create embeddings - using the same model as in test.py (loaded only if
+    # some document actually needs embedding)
+    print(f"Updating FAISS index at {index_dir} from {len(entries)} documents using {EMBEDDING_MODEL}")
+    indexer = IncrementalIndexer(index_dir, embedder_factory=lambda: registry.get_embedder(EMBEDDING_MODEL))
+    vectorstore = indexer.update(entries, settings={"model": EMBEDDING_MODEL, "backend": registry.backend})
     
-    # Save the index
-    print(f"Saving FAISS index to {index_dir}")
-    os.makedirs(index_dir, exist_ok=True)
-    vectorstore.save_local(index_dir)
-    
-    print(f"Successfully indexed {len(texts)} documents into FAISS at ./{index_dir}")
+    print(f"FAISS index at ./{index_dir} is up to date ({len(entries)} documents)")
     return vectorstore
 
 
 # Load Vector DB
 def load_vector_db():
     # Make sure to use the EXACT same model name and parameters 
-    # that were used to create the FAISS index
-    embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    
-    # If you're still getting dimension mismatches, you may need to recreate the index
+    # that were used to create the FAISS index.
+    # The store is loaded once per process and reloaded only when the
+    # files in INDEX_DIR change (see core/vector_store.py).
+    # Build the index on first use if it has never been created
+    if not (INDEX_DIR / "index.faiss").exists():
+        initialize_vector_store()
     try:
-        db = FAISS.load_local(str(INDEX_DIR), 
-                             embeddings=embedding_model, 
-                             allow_dangerous_deserialization=True)
-        return db
+        return get_vector_store(INDEX_DIR, EMBEDDING_MODEL)
     except AssertionError:
         print("Dimension mismatch between embeddings and index. You may need to recreate the index.")
         # You can add fallback behavior here
@@ -208,25 +223,25 @@ def generate_prompt(query):
         branches = []
         
         try:
-            if reviews_path.exists():
-                reviews = load_json(str(reviews_path))
-            else:
+            reviews = static_data.load(reviews_path)
+            if reviews is None:
+                reviews = []
                 print(f"Warning: Reviews file not found at {reviews_path}")
         except Exception as e:
             print(f"Error loading reviews: {e}")
             
         try:
-            if ratings_path.exists():
-                ratings = load_json(str(ratings_path))
-            else:
+            ratings = static_data.load(ratings_path)
+            if ratings is None:
+                ratings = []
                 print(f"Warning: Ratings file not found at {ratings_path}")
         except Exception as e:
             print(f"Error loading ratings: {e}")
             
         try:
-            if branches_path.exists():
-                branches = load_json(str(branches_path))
-            else:
+            branches = static_data.load(branches_path)
+            if branches is None:
+                branches = []
                 print(f"Warning: Branches file not found at {branches_path}")
         except Exception as e:
             print(f"Error loading branches: {e}")
@@ -291,72 +306,135 @@ def generate_prompt(query):
         print(f"Error generating prompt: {e}")
         return "Unable to generate institution profile due to data processing errors."
 
-# First create the endpoint
-endpoint = HuggingFaceEndpoint(
-    model="meta-llama/Meta-Llama-3-8B-Instruct",
-    task="text-generation",
-    temperature=0.3,
-    max_new_tokens=2048
-)
+def _load_llm():
+    from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+
+    hf_login_provider.get()
 
-# Then pass it to ChatHuggingFace
-llm = ChatHuggingFace(llm=endpoint)
+    # First create the endpoint
+    endpoint = HuggingFaceEndpoint(
+        model="meta-llama/Meta-Llama-3-8B-Instruct",
+        task="text-generation",
+        temperature=0.3,
+        max_new_tokens=2048
+    )
 
+    # Then pass it to ChatHuggingFace
+    return ChatHuggingFace(llm=endpoint)
+
+# Built on the first profile request
+llm_provider = LazyProvider("llm", _load_llm)
+
+
+def _profile_messages():
+    """Build the system + user messages for the institution profile prompt."""
+    from langchain.schema import HumanMessage, SystemMessage
+
+    prompt = generate_prompt("قدم ملفاً تعريفياً كاملاً عن بنك فلسطين")
+    return [
+        SystemMessage(content="أنت مساعد متخصص في بناء ملفات تعريفية للمؤسسات المالية. اكتب إجابتك باللغة العربية فقط. يجب عليك تضمين جميع تقييمات الفروع في ردك."),
+        HumanMessage(content=prompt)
+    ]
+
+
+def _missing_ratings_section(response):
+    """Return a branch-ratings section to append if the model left it out, else ""."""
+    # Use absolute path for ratings
+    base_dir = Path(__file__).resolve().parent
+    ratings_path = base_dir / "data" / "stars.json"
+    rating_summary = []
+    
+    try:
+        ratings = static_data.load(ratings_path, default=[])
+        if ratings:
+            for r in ratings:
+                if isinstance(r, dict) and "location" in r and "star" in r:
+                    rating_summary.append(f"{r['location']}: {r['star']}★")
+    except Exception as e:
+        print(f"Error loading ratings for verification: {e}")
+    
+    # If ratings aren't in the response, add them
+    if not any(rating in response for rating in rating_summary) and rating_summary:
+        # Add the ratings section if it doesn't exist
+        if "Branch Ratings" not in response and "تقييمات الفروع" not in response:
+            return "\n\n## تقييمات الفروع\n" + "\n".join(rating_summary)
+    return ""
+
+
+def build_institution_profile():
+    """Generate the profile text; unlike generate_institution_profile(), errors propagate."""
+    messages = _profile_messages()
+    
+    # Get the model's response
+    response = llm_provider.get().invoke(messages).content
+    response += _missing_ratings_section(response)
+    print("////////////")
+    print(response)
+    return response
 
 
 # Update the generate_institution_profile function to verify ratings are included
 def generate_institution_profile():
     try:
-        prompt = generate_prompt("قدم ملفاً تعريفياً كاملاً عن بنك فلسطين")
-        messages = [
-            SystemMessage(content="أنت مساعد متخصص في بناء ملفات تعريفية للمؤسسات المالية. اكتب إجابتك باللغة العربية فقط. يجب عليك تضمين جميع تقييمات الفروع في ردك."),
-            HumanMessage(content=prompt)
-        ]
-        
-        # Get the model's response
-        response = llm.invoke(messages).content
-        
-        # Use absolute path for ratings
-        base_dir = Path(__file__).resolve().parent
-        ratings_path = base_dir / "data" / "stars.json"
-        rating_summary = []
-        
-        try:
-            if ratings_path.exists():
-                ratings = load_json(str(ratings_path))
-                for r in ratings:
-                    if isinstance(r, dict) and "location" in r and "star" in r:
-                        rating_summary.append(f"{r['location']}: {r['star']}★")
-        except Exception as e:
-            print(f"Error loading ratings for verification: {e}")
-        
-        # If ratings aren't in the response, add them
-        if not any(rating in response for rating in rating_summary) and rating_summary:
-            rating_section = "\n\n## تقييمات الفروع\n" + "\n".join(rating_summary)
-        
-        # Add the ratings section if it doesn't exist
-            if "Branch Ratings" not in response and "تقييمات الفروع" not in response:
-                response += rating_section
-        print("////////////")
-        print(response)
-        return response
+        return build_institution_profile()
         
     except Exception as e:
         print(f"Error generating institution profile: {e}")
         return f"Unable to generate profile due to an error: {str(e)}"
 
+
+async def stream_institution_profile():
+    """
+    Async generator version of generate_institution_profile() that yields the
+    profile text chunk by chunk as the model produces it. The branch-ratings
+    section, if it has to be added, arrives as the last chunk.
+    """
+    # Prompt building reads files and searches FAISS; the first call may also
+    # log in to Hugging Face. Keep both off the event loop.
+    messages = await asyncio.to_thread(_profile_messages)
+    llm = await asyncio.to_thread(llm_provider.get)
+
+    parts = []
+    async for chunk in llm.astream(messages):
+        if chunk.content:
+            parts.append(chunk.content)
+            yield chunk.content
+
+    tail = await asyncio.to_thread(_missing_ratings_section, "".join(parts))
+    if tail:
+        yield tail
+
+def profile_inputs_fingerprint():
+    """
+    Hash of everything the profile is generated from: the reviews, stars and
+    voting files and the version of the FAISS index. A new value means the
+    stored profile is out of date.
+    """
+    base_dir = Path(__file__).resolve().parent
+    h = hashlib.sha256()
+    for name in ("bank_reviews.json", "stars.json", "voting.json"):
+        # The cached content hash; the files themselves are only re-read when they change
+        entry = static_data.get(base_dir / "data" / name)
+        h.update(name.encode("utf-8"))
+        h.update(entry.etag.encode("utf-8") if entry is not None else b"<missing>")
+    h.update(index_version(INDEX_DIR).encode("utf-8"))
+    return h.hexdigest()
+
+
 # Function to create the index and update your test.py to use it
 def initialize_vector_store():
     """Create a new FAISS index if it doesn't exist, or ensure it's compatible."""
     index_path = INDEX_DIR / "index.faiss"
     
-    if not INDEX_DIR.exists() or not index_path.exists():
-        print("FAISS index not found. Creating new index...")
-        create_faiss_index()
-        return True
-    else:
-        print("FAISS index already exists.")
-        return False   
+    # Concurrent first requests must not build the index twice
+    with _index_build_lock:
+        if not INDEX_DIR.exists() or not index_path.exists():
+            print("FAISS index not found. Creating new index...")
+            create_faiss_index()
+            return True
+        else:
+            print("FAISS index already exists.")
+            return False   
 # When you need to create/recreate the index
 # initialize_vector_store()
 # profile = generate_institution_profile()
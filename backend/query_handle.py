@@ -1,10 +1,16 @@
 import os
 import logging
 import re
-import torch
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
 from langchain.schema import Document
+from backend.core.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+from backend.core.chunking import estimate_tokens
+from backend.core.embedding_batcher import EmbeddingBatcher
+from backend.core.embedding_cache import QueryEmbeddingCache
+from backend.core.vector_store import registry, get_vector_store
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -13,47 +19,70 @@ logging.basicConfig(
 )
 logger = logging.getLogger("QueryPipeline")
 
+# Runs a query's BM25 search while its dense search (embedding + FAISS) runs
+# on the calling thread. Only the cheap sparse side goes through this pool, so
+# it never limits how many requests embed (and get batched) at once.
+_sparse_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SPARSE_SEARCH_WORKERS", "4")), thread_name_prefix="sparse-search"
+)
+
+# Queries made only of codes/numbers (IBAN branch codes, account types) are
+# exact lookups; the sparse index answers them without embedding anything
+_EXACT_TERM = re.compile(r"^[a-z]*\d[\w-]*$")
+
 
 class QueryPipeline:
     def __init__(
         self,
         index_dir: str = "faiss_index",
         embedder_model: str = "intfloat/multilingual-e5-base",
-        top_k: int = 2
+        top_k: int = 2,
+        index_builder: Optional[Callable[[], None]] = None,
+        token_budget: Optional[int] = None,
+        candidate_k: int = 20,
+        hybrid: bool = True,
+        rrf_k: int = 60,
+        embedding_cache: Optional[QueryEmbeddingCache] = None,
+        embedding_batcher: Optional[EmbeddingBatcher] = None,
     ):
         """
         Initialize the pipeline components:
           - index_dir: where our FAISS index lives
           - embedder_model: name of the HuggingFace embedding
           - top_k: number of top documents to retrieve
+          - index_builder: optional callable run once, before the index is first
+            loaded, that (re)builds it if it is missing or outdated
+          - token_budget: if set, retrieve up to `candidate_k` passages and return
+            the best ones that fit in this many (estimated) tokens instead of
+            the top_k whole documents
+          - hybrid: also search a BM25 index over the same documents and fuse
+            both rankings with reciprocal rank fusion (constant `rrf_k`)
+          - embedding_cache: optional cache of query embeddings, so repeated
+            questions are not embedded again
+          - embedding_batcher: optional scheduler that embeds concurrent
+            queries together in one batched forward pass
         """
         self.index_dir = index_dir
+        self.embedder_model = embedder_model
         self.top_k = top_k
+        self.index_builder = index_builder
+        self.token_budget = token_budget
+        self.candidate_k = candidate_k
+        self.hybrid = hybrid
+        self.rrf_k = rrf_k
+        self.embedding_cache = embedding_cache
+        self.embedding_batcher = embedding_batcher
+        self._device: Optional[str] = None
+        self._index_checked = False
+        self._index_lock = threading.Lock()
+        # (FAISS store it was built from, BM25 index); rebuilt when the store is reloaded
+        self._sparse = None
+        self._sparse_lock = threading.Lock()
 
-        # 1. Initialize the HuggingFace embedder on CPU or GPU
-        try:
-            self.embedder = HuggingFaceEmbeddings(
-                model_name=embedder_model,
-                model_kwargs={"device": "cuda" if torch.cuda.is_available() else "cpu"},
-            )
-            logger.info(f"Embedder model '{embedder_model}' loaded successfully.")
-        except Exception as e:
-            logger.error(f"Error loading embedder model '{embedder_model}': {e}")
-            raise
-
-        # 2. Load the FAISS index that was built without chunking
-        try:
-            self.vectorstore = FAISS.load_local(
-                self.index_dir,
-                self.embedder,
-                allow_dangerous_deserialization=True
-            )
-            logger.info(f"FAISS index loaded from '{self.index_dir}'.")
-        except Exception as e:
-            logger.error(f"Error loading FAISS index from '{self.index_dir}': {e}")
-            raise
+        # The embedder and FAISS index are heavy, so they are loaded on first
+        # use (see the `embedder` and `vectorstore` properties), not here.
 
-        # 3. Prepare the “نظرة عامة” document for forced inclusion
+        # Curated bank overview, searchable through the sparse index (e.g. "نظرة عامة")
         self.overview_doc = Document(
             page_content=(
                 "• نظرة عامة\n"
@@ -112,25 +141,59 @@ class QueryPipeline:
             metadata={"source": "https://www.bankofpalestine.com", "lang": "ar"}
         )
 
+    @property
+    def device(self) -> str:
+        if self._device is None:
+            if registry.backend != "torch":
+                # ONNX Runtime embedders run on CPU; don't pull in torch for nothing
+                self._device = "cpu"
+                return self._device
+            import torch
+            self._device = "cuda" if torch.cuda.is_available() else "cpu"
+        return self._device
+
+    @property
+    def embedder(self):
+        """The HuggingFace embedder, loaded on first access and shared process-wide."""
+        try:
+            return registry.get_embedder(self.embedder_model, self.device)
+        except Exception as e:
+            logger.error(f"Error loading embedder model '{self.embedder_model}': {e}")
+            raise
+
+    @property
+    def vectorstore(self):
+        """The FAISS index, loaded on first access and reloaded when it changes on disk."""
+        if self.index_builder is not None and not self._index_checked:
+            with self._index_lock:
+                if not self._index_checked:
+                    self.index_builder()
+                    self._index_checked = True
+        try:
+            return get_vector_store(self.index_dir, self.embedder_model, self.device)
+        except Exception as e:
+            logger.error(f"Error loading FAISS index from '{self.index_dir}': {e}")
+            raise
+
     def handleQuery(self, query: str) -> str:
         """
         Full pipeline:
-          1. Embed the user’s query
-          2. Search FAISS for top_k similar documents (each doc is whole text)
-          3. If "نظرة عامة" appears in the query, prepend the overview_doc
-          4. Return those documents’ full content concatenated, or “No relevant info” if none found.
+          1. Search FAISS (dense, embedding the query) and, if hybrid, the BM25
+             index (sparse) in parallel, and fuse the rankings; queries that are
+             only codes/numbers use the sparse index alone
+          2. Keep the top_k documents (each doc is whole text), or, with a
+             token_budget, the best passages that fit the budget
+          3. Return those documents’ full content concatenated, or “No relevant info” if none found.
         """
         try:
-            results = []
-            if "نظرة عامة" in query:
-            # Ensure the overview document appears first
-                results.insert(0, self.overview_doc)
-                print("0000000000000000000000000000000000000000")
-                print("Overview document prepended to results.")
-                print("0000000000000000000000000000000000000000")
+            k = self.candidate_k if self.token_budget else self.top_k
+            logger.debug(f"Performing {'hybrid' if self.hybrid else 'semantic'} search for query: '{query}'")
+            candidates = self.retrieve(query, k)
+            if self.token_budget:
+                results = self._pack_passages(candidates)
+                logger.debug(f"Selected {len(results)} of {len(candidates)} passages for query: '{query}'")
             else:
-                logger.debug(f"Performing semantic search for query: '{query}'")
-                results = self.vectorstore.similarity_search(query, k=self.top_k)
+                results = candidates
                 logger.debug(f"Found {len(results)} documents for query: '{query}'")
 
           
@@ -138,8 +201,11 @@ class QueryPipeline:
                 logger.warning("No results found for the query.")
                 return "No relevant information found."
 
-            # Each `doc` is already a full document, so we can grab page_content directly
-            full_texts = [doc.page_content for doc in results]
+            if self.token_budget:
+                full_texts = self._merge_by_page(results)
+            else:
+                # Each `doc` is already a full document, so we can grab page_content directly
+                full_texts = [doc.page_content for doc in results]
 
             # Join them (if you want multiple docs) with a visible separator
             context = "\n\n===== DOCUMENT BOUNDARY =====\n\n".join(full_texts)
@@ -150,4 +216,80 @@ class QueryPipeline:
             logger.error(f"Error handling query '{query}': {e}")
             return "An error occurred while processing your query."
 
+    def embed_query(self, query: str) -> List[float]:
+        """Embedding of `query`, served from the embedding cache when possible."""
+        if self.embedding_cache is None:
+            return self._embed_uncached(query)
+        return self.embedding_cache.get_or_compute(query, self._embed_uncached)
+
+    def _embed_uncached(self, query: str) -> List[float]:
+        if self.embedding_batcher is not None:
+            return self.embedding_batcher.embed(query)
+        return self.embedder.embed_query(query)
+
+    def _dense_search(self, store, query: str, k: int) -> List[Document]:
+        return store.similarity_search_by_vector(self.embed_query(query), k=k)
 
+    def retrieve(self, query: str, k: int) -> List[Document]:
+        """The `k` best documents for `query`, dense and sparse results fused with RRF."""
+        store = self.vectorstore
+        if not self.hybrid:
+            return self._dense_search(store, query, k)
+
+        sparse_index = self._sparse_index(store)
+        terms = tokenize(query)
+        if terms and all(_EXACT_TERM.match(term) for term in terms):
+            hits = sparse_index.search(query, k=k)
+            if hits:
+                logger.debug(f"Exact-term query answered from the sparse index: '{query}'")
+                return [doc for doc, _ in hits]
+
+        sparse = _sparse_pool.submit(sparse_index.search, query, k)
+        dense = self._dense_search(store, query, k)
+        rankings = [dense, [doc for doc, _ in sparse.result()]]
+        return reciprocal_rank_fusion(rankings, k=self.rrf_k)[:k]
+
+    def _sparse_index(self, store) -> BM25Index:
+        """BM25 index over the documents of `store` plus the overview document."""
+        current = self._sparse
+        if current is not None and current[0] is store:
+            return current[1]
+        with self._sparse_lock:
+            current = self._sparse
+            if current is None or current[0] is not store:
+                documents = list(store.docstore._dict.values()) + [self.overview_doc]
+                current = (store, BM25Index(documents))
+                self._sparse = current
+                logger.info(f"Built BM25 index over {len(documents)} documents.")
+        return current[1]
+
+    def _pack_passages(self, candidates: List[Document]) -> List[Document]:
+        """Greedily keep the highest-ranked passages that fit in token_budget."""
+        selected, used = [], 0
+        for doc in candidates:
+            cost = estimate_tokens(doc.page_content)
+            if used + cost > self.token_budget:
+                continue
+            selected.append(doc)
+            used += cost
+        if not selected and candidates:
+            # Even the best passage is too long: keep as much of it as fits
+            best = candidates[0]
+            words = best.page_content.split()[: int(self.token_budget / 1.5)]
+            selected = [Document(page_content=" ".join(words), metadata=best.metadata)]
+        return selected
+
+    @staticmethod
+    def _merge_by_page(passages: List[Document]) -> List[str]:
+        """
+        Group passages by the page they came from (pages ordered by their best
+        passage) and put each page's passages back in reading order.
+        """
+        pages: "OrderedDict[str, List[Document]]" = OrderedDict()
+        for doc in passages:
+            pages.setdefault(doc.metadata.get("source", ""), []).append(doc)
+        texts = []
+        for docs in pages.values():
+            docs.sort(key=lambda d: d.metadata.get("chunk_index", 0))
+            texts.append("\n...\n".join(d.page_content for d in docs))
+        return texts
@@ -1,5 +1,5 @@
 # backend/schemas.py
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from datetime import datetime
 from typing import List, Optional
 from typing import Literal
@@ -53,6 +53,8 @@ class MessageInput(BaseModel):
 class AnswerRequest(BaseModel):
     question: str
     document: str
+    # Ask the answer service to stream tokens (server-sent events)
+    stream: bool = False
 
 class AnswerResponse(BaseModel):
     answer: str
@@ -78,6 +80,12 @@ class ReviewIn(BaseModel):
     location: str
     source: str
 
+    @field_validator("location")
+    @classmethod
+    def strip_location(cls, value: str) -> str:
+        # One spelling per location for the store's index, the stats and /reviews?location=
+        return value.strip()
+
 class ReviewOut(ReviewIn):
     """
     The shape of each review when we return it via API:
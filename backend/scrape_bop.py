@@ -1,22 +1,29 @@
-#  Description: This script scrapes BOP website, cleans the data, and saves it in a JSON file.
+#  Description: This script scrapes BOP website, cleans the data, and saves it in a JSONL file.
 import os
 import re
-import json
+import asyncio
+import httpx
 import requests
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-from collections import Counter
+from urllib.parse import urljoin, urldefrag, urlparse
+from collections import Counter, deque
+from crawl_store import CrawlStore
+from core.corpus import CorpusWriter, iter_corpus
 
 # --- Configuration ---
 BASE_URL    = "https://www.bankofpalestine.com/ar/personal"
 MAX_PAGES   = 370  # Max pages to crawl
+CONCURRENCY   = int(os.getenv("CRAWL_CONCURRENCY", "8"))      # parallel fetches
+RATE_PER_HOST = float(os.getenv("CRAWL_RATE_PER_HOST", "8"))  # requests/second per host, 0 = unlimited
 OUTPUT_DIR  = "scraped_data"
-OUTPUT_FILE = os.path.join(OUTPUT_DIR, "bop_website_cleaned.json")
+RAW_FILE    = os.path.join(OUTPUT_DIR, "bop_website_raw.jsonl")      # every page's lines, before filtering
+OUTPUT_FILE = os.path.join(OUTPUT_DIR, "bop_website_cleaned.jsonl")
+CRAWL_STATE_DB = os.path.join(OUTPUT_DIR, "crawl_state.sqlite3")  # ETags, hashes, lines per URL
 
 # --- Globals ---
 visited          = set()
 GLOBAL_LINE_FREQ = Counter()
-ALL_PAGES_RAW    = []  # Stores {"url": ..., "lines": [...]}
+ALL_PAGES_RAW    = []  # Stores {"url": ..., "lines": [...]} (unless pages are streamed to a callback)
 
 # --- Helpers ---
 
@@ -36,17 +43,17 @@ def is_suspicious_text(text: str) -> bool:
         return True
     return False
 
-def extract_text_from_url(url: str,
-                          min_word_count: int = 2,
-                          min_char_count: int = 12) -> list[str]:
-    """Fetch page, strip HTML, split into lines, filter out rubbish."""
-    resp = requests.get(url)
-    resp.raise_for_status()
-    resp.encoding = resp.apparent_encoding
+def extract_lines(html: str,
+                  min_word_count: int = 2,
+                  min_char_count: int = 12) -> list[str]:
+    """Strip HTML, split into lines, filter out rubbish."""
+    soup = BeautifulSoup(clean_unicode_control_chars(html), "html.parser")
+    return _lines_from_soup(soup, min_word_count, min_char_count)
 
-    cleaned_html = clean_unicode_control_chars(resp.text)
-    soup         = BeautifulSoup(cleaned_html, "html.parser")
-    raw_text     = soup.get_text(separator="\n")
+def _lines_from_soup(soup: BeautifulSoup,
+                     min_word_count: int = 2,
+                     min_char_count: int = 12) -> list[str]:
+    raw_text = soup.get_text(separator="\n")
 
     lines = []
     for line in raw_text.split("\n"):
@@ -59,47 +66,173 @@ def extract_text_from_url(url: str,
         lines.append(line)
 
     # --- DEDUPE LINES WITHIN THIS PAGE, PRESERVE ORDER ---
-    unique = []
-    seen   = set()
-    for l in lines:
-        if l not in seen:
-            unique.append(l)
-            seen.add(l)
-    return unique
+    return list(dict.fromkeys(lines))
 
-def is_valid_url(url: str) -> bool:
-    return url.startswith(BASE_URL)
+def parse_page(html: str, url: str, base_url: str = BASE_URL) -> tuple[list[str], list[str]]:
+    """Parse a page once and return (text lines, same-site links)."""
+    soup  = BeautifulSoup(clean_unicode_control_chars(html), "html.parser")
+    links = []
+    for a in soup.find_all("a", href=True):
+        full, _ = urldefrag(urljoin(url, a["href"]))
+        if is_valid_url(full, base_url):
+            links.append(full)
+    return _lines_from_soup(soup), links
+
+def extract_text_from_url(url: str,
+                          min_word_count: int = 2,
+                          min_char_count: int = 12) -> list[str]:
+    """Fetch page, strip HTML, split into lines, filter out rubbish."""
+    resp = requests.get(url)
+    resp.raise_for_status()
+    resp.encoding = resp.apparent_encoding
+    return extract_lines(resp.text, min_word_count, min_char_count)
+
+def is_valid_url(url: str, base_url: str = BASE_URL) -> bool:
+    return url.startswith(base_url)
 
 # --- Crawl & collect ---
 
-def crawl_site(start_url: str, max_pages: int = 2) -> list[dict]:
-    to_visit = [start_url]
+class HostRateLimiter:
+    """Spaces out request starts so each host sees at most `rate` requests/second."""
 
-    while to_visit and len(visited) < max_pages:
-        url = to_visit.pop(0)
-        if url in visited or not is_valid_url(url):
-            continue
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next  = {}
+        self._locks = {}
 
-        visited.add(url)
-        print(f"({len(visited)}) Crawling: {url}")
+    async def wait(self, url: str):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            loop  = asyncio.get_running_loop()
+            delay = self._next.get(host, 0.0) - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next[host] = loop.time() + self.interval
 
-        try:
-            texts = extract_text_from_url(url)
-        except requests.RequestException:
-            continue
+async def crawl_site_async(start_url: str,
+                           max_pages: int = 2,
+                           base_url: str = BASE_URL,
+                           concurrency: int = CONCURRENCY,
+                           rate_per_host: float = RATE_PER_HOST,
+                           timeout: float = 30.0,
+                           store: CrawlStore = None,
+                           on_page=None) -> list[dict]:
+    """
+    Breadth-first crawl with `concurrency` workers sharing one pooled HTTP
+    client. Each page is downloaded once and parsed once for both its text
+    and its links. Returns [{"url", "lines", "changed"}] in the order pages
+    were claimed.
+
+    With a `store`, pages seen before are requested conditionally
+    (ETag / Last-Modified); a 304 reuses the stored lines and links.
+
+    With `on_page`, each page is handed to the callback as soon as it is
+    crawled and not kept in memory; the returned list is then empty.
+    """
+    frontier = deque([start_url])
+    seen     = {start_url}          # every URL ever queued
+    claimed  = 0                    # URLs taken from the frontier (≤ max_pages)
+    pages    = {}                   # claim order → {"url", "lines"}
+    limiter  = HostRateLimiter(rate_per_host)
+    wakeup   = asyncio.Condition()
+    active   = 0                    # workers currently fetching
 
-        # update global frequency (each line counts at most once per page)
-        for line in texts:
-            GLOBAL_LINE_FREQ[line] += 1
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=True) as client:
 
-        ALL_PAGES_RAW.append({"url": url, "lines": texts})
+        async def worker():
+            nonlocal claimed, active
+            while True:
+                async with wakeup:
+                    # Wait for work, or stop when nothing is queued or in flight
+                    while not frontier and active and claimed < max_pages:
+                        await wakeup.wait()
+                    if not frontier or claimed >= max_pages:
+                        wakeup.notify_all()
+                        return
+                    url   = frontier.popleft()
+                    order = claimed
+                    claimed += 1
+                    active  += 1
+                print(f"({order + 1}) Crawling: {url}")
 
-        # enqueue same-domain links
-        soup = BeautifulSoup(requests.get(url).text, "html.parser")
-        for a in soup.find_all("a", href=True):
-            full = urljoin(url, a["href"])
-            if full not in visited and is_valid_url(full):
-                to_visit.append(full)
+                links = []
+                try:
+                    headers = store.conditional_headers(url) if store else {}
+                    await limiter.wait(url)
+                    resp = await client.get(url, headers=headers)
+                    cached = store.get(url) if resp.status_code == 304 and store else None
+                    if resp.status_code == 304 and cached is None:
+                        # Nothing stored to reuse (e.g. pruned meanwhile): fetch it in full
+                        await limiter.wait(url)
+                        resp = await client.get(url)
+                    if cached is not None:
+                        # Unchanged since the last crawl: no download, no parse
+                        lines, links, changed = cached["lines"], cached["links"], False
+                    else:
+                        resp.raise_for_status()
+                        # Parsing is CPU-bound; keep it off the event loop
+                        lines, links = await asyncio.to_thread(parse_page, resp.text, url, base_url)
+                        changed = True
+                        if store:
+                            changed = store.save(url, lines, links,
+                                                 etag=resp.headers.get("ETag"),
+                                                 last_modified=resp.headers.get("Last-Modified"))
+                    page = {"url": url, "lines": lines, "changed": changed}
+                    if on_page:
+                        on_page(page)
+                    else:
+                        pages[order] = page
+                except httpx.HTTPError as e:
+                    print(f"    skipped {url}: {e}")
+
+                async with wakeup:
+                    for link in links:
+                        if link not in seen:
+                            seen.add(link)
+                            frontier.append(link)
+                    active -= 1
+                    wakeup.notify_all()
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    return [pages[i] for i in sorted(pages)]
+
+def crawl_site(start_url: str, max_pages: int = 2, store: CrawlStore = None,
+               on_page=None, **kwargs) -> list[dict]:
+    """
+    Crawl and update the module globals. Pages are collected in ALL_PAGES_RAW,
+    or passed to `on_page` one at a time if given (memory stays flat).
+    """
+    counts = {"pages": 0, "changed": 0}
+    # Counts describe this crawl only, however many times it runs in a process
+    GLOBAL_LINE_FREQ.clear()
+
+    def collect(pg):
+        visited.add(pg["url"])
+        counts["pages"]   += 1
+        counts["changed"] += pg["changed"]
+        if not store:
+            # update global frequency (each line counts at most once per page)
+            for line in pg["lines"]:
+                GLOBAL_LINE_FREQ[line] += 1
+        if on_page:
+            on_page(pg)
+        else:
+            ALL_PAGES_RAW.append(pg)
+
+    asyncio.run(crawl_site_async(start_url, max_pages=max_pages, store=store, on_page=collect, **kwargs))
+
+    if store:
+        # Drop pages that weren't reached this time, so the stored line
+        # counts describe exactly this crawl's pages
+        removed = store.prune(visited)
+        GLOBAL_LINE_FREQ.update(store.line_frequencies())  # empty since the crawl started
+        print(f"[crawl] {counts['changed']} new/changed, "
+              f"{counts['pages'] - counts['changed']} unchanged, {removed} removed")
 
     return ALL_PAGES_RAW
 
@@ -118,27 +251,36 @@ def filter_repeated_lines(lines: list[str],
 def run():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    # 1) Crawl
-    pages_raw = crawl_site(BASE_URL, max_pages=MAX_PAGES)
-    total     = len(pages_raw)
-
-    # 2) Filter & package
-    cleaned = []
-    for pg in pages_raw:
-        kept_text = filter_repeated_lines(pg["lines"], min_freq=0.5, total_pages=total)
-        content   = "\n".join(kept_text)
-        if len(content) > 200:
-            cleaned.append({
-                "url":     pg["url"],
-                "lang":    "ar" if "/ar/" in pg["url"] else "en",
-                "content": content
-            })
-
-    # 3) Save JSON
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(cleaned, f, ensure_ascii=False, indent=2)
-
-    print(f"\n[✓] Cleaned {len(cleaned)} pages → '{OUTPUT_FILE}'")
+    # 1) Crawl (conditionally, reusing pages unchanged since the last run),
+    #    streaming raw pages to disk instead of keeping them in memory
+    store = CrawlStore(CRAWL_STATE_DB)
+    try:
+        with CorpusWriter(RAW_FILE) as raw_out:
+            crawl_site(BASE_URL, max_pages=MAX_PAGES, store=store,
+                       on_page=lambda pg: raw_out.write({"url": pg["url"], "lines": pg["lines"]}))
+            total = raw_out.count
+    finally:
+        store.close()
+
+    # 2) Filter & package (second streaming pass, now that line counts are known)
+    def cleaned_pages():
+        for pg in iter_corpus(RAW_FILE):
+            kept_text = filter_repeated_lines(pg["lines"], min_freq=0.5, total_pages=total)
+            content   = "\n".join(kept_text)
+            if len(content) > 200:
+                yield {
+                    "url":     pg["url"],
+                    "lang":    "ar" if "/ar/" in pg["url"] else "en",
+                    "content": content
+                }
+
+    # 3) Save JSONL
+    with CorpusWriter(OUTPUT_FILE) as out:
+        kept = out.write_all(cleaned_pages())
+
+    # Pages whose cleaned content is unchanged hash the same, so the incremental
+    # indexer (core/incremental_index.py) only re-embeds what this crawl changed.
+    print(f"\n[✓] Cleaned {kept} pages → '{OUTPUT_FILE}'")
 
 if __name__ == "__main__":
     run()
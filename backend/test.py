@@ -8,33 +8,49 @@ from transformers.pipelines import pipeline
 from langchain_community.vectorstores import FAISS
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.schema.document import Document
+from core.corpus import iter_corpus, resolve_corpus_path
+import extraction_engine as engine
+from ner_extraction import NER_MODEL, NERCache, extract_named_entities, merge_with_known_entities
 
 # Path configurations
 BACKEND_DIR = Path(__file__).resolve().parent
 INDEX_DIR = BACKEND_DIR / "faiss_index2"
 DATA_DIR = BACKEND_DIR / "scraped_data"
-JSON_FILE = DATA_DIR / "bop_website_cleaned.json"
+JSON_FILE = DATA_DIR / "bop_website_cleaned.jsonl"
 
-# Load NER pipeline from Hugging Face (no spaCy required)
-print("Loading NER model from Hugging Face...")
-try:
-    ner_pipeline = pipeline(
-        "token-classification", 
-        model="CAMeL-Lab/bert-base-arabic-camelbert-ca-ner",
-        aggregation_strategy="simple"
-    )
-    print("NER model loaded successfully!")
-except Exception as e:
-    print(f"Error loading NER model: {e}")
-    print("Will use regex-based entity extraction as fallback")
-    ner_pipeline = None
+# Processes used for profile extraction (1 = run in this process)
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", os.cpu_count() or 1))
+
+# Entities found by the NER model, per page content hash
+NER_CACHE_PATH = BACKEND_DIR / "data" / "ner_cache.sqlite3"
+
+ner_pipeline = None
+
+def load_ner_pipeline():
+    """Load the NER pipeline from Hugging Face (no spaCy required) on first use"""
+    global ner_pipeline
+    if ner_pipeline is not None:
+        return ner_pipeline
+    print("Loading NER model from Hugging Face...")
+    try:
+        ner_pipeline = pipeline(
+            "token-classification", 
+            model=NER_MODEL,
+            aggregation_strategy="simple"
+        )
+        print("NER model loaded successfully!")
+    except Exception as e:
+        print(f"Error loading NER model: {e}")
+        print("Will use regex-based entity extraction as fallback")
+        ner_pipeline = None
+    return ner_pipeline
 
 def load_raw_data():
-    """Load data directly from the JSON file"""
-    if JSON_FILE.exists():
-        print(f"Loading data from {JSON_FILE}")
-        with open(JSON_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    """Load data directly from the JSONL corpus (or the older JSON export)"""
+    path = resolve_corpus_path(JSON_FILE)
+    if path.exists():
+        print(f"Loading data from {path}")
+        return list(iter_corpus(path))
     print(f"Warning: {JSON_FILE} not found")
     return []
 
@@ -88,14 +104,9 @@ def extract_bank_services(documents):
     }
     
     # Keywords to identify different service types (Arabic and English)
-    service_keywords = {
-        "accounts": ["حساب", "الحسابات", "وديعة", "الودائع", "توفير", "account", "deposit", "savings"],
-        "loans": ["قرض", "القروض", "تمويل", "الرهن", "loan", "mortgage", "financing"],
-        "cards": ["بطاقة", "البطاقات", "فيزا", "ماستركارد", "card", "visa", "mastercard"],
-        "digital_services": ["الكتروني", "رقمي", "انترنت", "موبايل", "تطبيق", "digital", "online", "mobile", "app"],
-        "investment_products": ["استثمار", "الأوراق المالية", "صندوق", "investment", "securities", "fund"],
-        "transfer_services": ["حوالة", "تحويل", "سويفت", "transfer", "swift", "remittance"]
-    }
+    service_keywords = engine.SERVICE_KEYWORDS
+    
+    seen = {category: set() for category in services}
     
     # Process each document
     for doc in documents:
@@ -116,14 +127,16 @@ def extract_bank_services(documents):
                     service_name = title.strip()
                     
                     # Add to appropriate category if not already there
-                    if service_name not in services[category]:
+                    if service_name not in seen[category]:
+                        seen[category].add(service_name)
                         services[category].append(service_name)
                         
                     # Extract specific features from content
                     features = re.findall(r'(?:•|\-|\*)\s*([^\n•\-\*]+)', content)
                     for feature in features:
                         feature_text = f"{service_name}: {feature.strip()}"
-                        if feature_text not in services[category]:
+                        if feature_text not in seen[category]:
+                            seen[category].add(feature_text)
                             services[category].append(feature_text)
     
     return services
@@ -133,10 +146,7 @@ def extract_branch_locations(data):
     branches = set()
     
     # Known branch locations in Palestine
-    palestinian_cities = [
-        "رام الله", "غزة", "نابلس", "جنين", "طولكرم", "الخليل", "بيت لحم", "أريحا", "قلقيلية", "طوباس",
-        "سلفيت", "دير البلح", "خان يونس", "رفح", "البيرة", "النصيرات"
-    ]
+    palestinian_cities = engine.PALESTINIAN_CITIES
     
     for entry in data:
         content = entry.get("content", "")
@@ -190,8 +200,8 @@ def extract_fees_and_rates(data):
         "interest_rates": []
     }
     
-    fee_keywords = ["رسوم", "عمولة", "تكلفة", "fee", "charge", "commission"]
-    rate_keywords = ["فائدة", "نسبة", "rate", "interest", "margin"]
+    fee_keywords = engine.FEE_KEYWORDS
+    rate_keywords = engine.RATE_KEYWORDS
     
     for entry in data:
         content = entry.get("content", "")
@@ -220,9 +230,7 @@ def extract_digital_features(data):
     """Extract digital banking features and capabilities"""
     features = []
     
-    digital_keywords = [
-        "تطبيق", "انترنت", "الكتروني", "رقمي", "موبايل", "بنكي", "app", "internet", "digital", "mobile", "online"
-    ]
+    digital_keywords = engine.DIGITAL_KEYWORDS
     
     for entry in data:
         content = entry.get("content", "")
@@ -246,56 +254,23 @@ def extract_digital_features(data):
                             features.append(f"  - {feat.strip()}")
     
     # Remove duplicates while preserving order
-    unique_features = []
-    for feature in features:
-        if feature not in unique_features:
-            unique_features.append(feature)
-    
-    return unique_features
+    return list(dict.fromkeys(features))
 
 def extract_known_entities(documents):
     """Extract commonly known entities that might be missed by the NER model"""
-    known_entities = {
-        "founders": ["هاشم عطا الشوا", "Hashim Atta Al-Shawa", "Hashim Al-Shawa", "المرحوم هاشم عطا الشوا"],
-        "staff": [
-            "هاشم الشوا", "محمود الشوا", "صقر النمري", "مها عوض", "نبيل قدومي",
-            "Hashim Al-Shawa", "Mahmoud Al-Shawa", "Saqer Al-Nimri", "Maha Awad", "Nabil Qaddumi",
-            "رئيس مجلس الإدارة", "المدير التنفيذي", "المدير المالي"
-        ],
-        "branches": [
-            "رام الله", "غزة", "نابلس", "جنين", "طولكرم", "الخليل", "بيت لحم", "أريحا", "قلقيلية", 
-            "طوباس", "سلفيت", "دير البلح", "خان يونس", "رفح", "البيرة", "النصيرات", "الرمال",
-            "Ramallah", "Gaza", "Nablus", "Jenin", "Tulkarm", "Hebron", "Bethlehem", "Jericho", "Qalqilya"
-        ],
-        "csr_programs": [
-            "فلسطين في القلب", "Palestine in the Heart", "صندوق دعم التعليم", "Education Support Fund",
-            "المسؤولية الاجتماعية", "CSR", "مبادرات"
-        ],
-        "partners": [
-            "IFC", "EBRD", "PROPARCO", "FISEA+", "SANAD", "TechnoPark", 
-            "مؤسسة التمويل الدولية", "البنك الأوروبي لإعادة الإعمار والتنمية",
-            "الاتحاد الأوروبي", "European Union", "سلطة النقد الفلسطينية"
-        ],
-        "awards": [
-            "Best Bank in Financial Inclusion", "أفضل بنك في الشمول المالي",
-            "جائزة", "award", "تكريم", "recognition"
-        ],
-        "contact_info": [
-            "1700150150", "www.bankofpalestine.com", "البريد الالكتروني", "email",
-            "رقم الهاتف", "phone number", "العنوان", "address"
-        ]
-    }
+    known_entities = engine.KNOWN_ENTITIES
     
     results = {category: [] for category in known_entities}
+    seen = {category: set() for category in known_entities}
     
     # Check each document for known entities
     for doc in documents:
         text = doc.page_content if hasattr(doc, "page_content") else doc
         for category, entities in known_entities.items():
             for entity in entities:
-                if entity in text:
-                    if entity not in results[category]:
-                        results[category].append(entity)
+                if entity in text and entity not in seen[category]:
+                    seen[category].add(entity)
+                    results[category].append(entity)
     
     return results
 
@@ -311,12 +286,30 @@ def main():
     # Create document objects from raw data
     documents = [Document(page_content=entry["content"]) for entry in raw_data]
     
-    # Extract different types of information
-    branch_locations = extract_branch_locations(raw_data)
-    bank_services = extract_bank_services(documents)
-    fees_and_rates = extract_fees_and_rates(raw_data)
-    digital_features = extract_digital_features(raw_data)
-    known_entities = extract_known_entities(documents)
+    # Extract different types of information. Pages are processed in parallel
+    # by the engine's precompiled single-pass extractors and merged in corpus
+    # order; the functions above are kept as the reference implementation,
+    # see bench_extraction.py
+    profile = engine.extract_profile(
+        [doc.page_content for doc in documents],
+        workers=EXTRACTION_WORKERS,
+        langs=[doc.metadata.get("lang") for doc in documents],
+    )
+    branch_locations = profile["branch_locations"]
+    bank_services = profile["bank_services"]
+    fees_and_rates = {"fees": profile["fees"], "interest_rates": profile["interest_rates"]}
+    digital_features = profile["digital_features"]
+    known_entities = profile["known_entities"]
+    
+    # Add people, organizations and locations found by the NER model
+    ner = load_ner_pipeline()
+    if ner is not None:
+        cache = NERCache(NER_CACHE_PATH)
+        try:
+            page_entities = extract_named_entities([doc.page_content for doc in documents], ner, cache)
+        finally:
+            cache.close()
+        known_entities = merge_with_known_entities(known_entities, page_entities)
     
     # Combine all extracted information
     combined_data = {
@@ -334,7 +327,10 @@ def main():
         "csr_programs": known_entities.get("csr_programs", []),
         "awards": known_entities.get("awards", []),
         "partners": known_entities.get("partners", []),
-        "contact_info": known_entities.get("contact_info", [])
+        "contact_info": known_entities.get("contact_info", []),
+        "people": known_entities.get("people", []),
+        "organizations": known_entities.get("organizations", []),
+        "locations": known_entities.get("locations", [])
     }
     
     # Display results
@@ -390,6 +386,12 @@ def main():
     for partner in combined_data["partners"][:8]:
         print(f"  • {partner}")
     
+    print("\n🔎 OTHER NAMED ENTITIES:")
+    for category in ("people", "organizations", "locations"):
+        print(f"  {category.upper()}:")
+        for entity in combined_data[category][:5]:
+            print(f"  • {entity}")
+    
     # Save results to JSON file
     output_file = BACKEND_DIR / "data" / "bank_profile_data.json"
     os.makedirs(output_file.parent, exist_ok=True)
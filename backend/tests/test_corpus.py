@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from backend.core.corpus import CorpusWriter, iter_corpus, resolve_corpus_path
+
+
+class Interrupted(Exception):
+    pass
+
+
+def _interrupted_crawl(path, records):
+    """Write `records` with CorpusWriter, then fail mid-record as a crash would."""
+    with pytest.raises(Interrupted):
+        with CorpusWriter(path) as writer:
+            for record in records:
+                writer.write(record)
+            writer._file.write('{"url": "https://example.com/trunc')
+            writer._file.flush()
+            raise Interrupted()
+    return writer
+
+
+def test_partial_file_is_read_after_interrupted_crawl(tmp_path):
+    path = tmp_path / "corpus.jsonl"
+    records = [{"url": f"https://example.com/{i}", "content": f"صفحة {i}"} for i in range(3)]
+
+    writer = _interrupted_crawl(path, records)
+
+    assert not path.exists()
+    assert writer.partial_path.exists()
+    assert list(iter_corpus(writer.partial_path)) == records
+
+
+def test_resolve_falls_back_to_partial(tmp_path):
+    path = tmp_path / "corpus.jsonl"
+    records = [{"url": "https://example.com/", "content": "نص"}]
+    writer = _interrupted_crawl(path, records)
+
+    assert resolve_corpus_path(path) == writer.partial_path
+    assert resolve_corpus_path(tmp_path / "corpus.json") == writer.partial_path
+    assert list(iter_corpus(path)) == records
+
+
+def test_complete_corpus_wins_over_partial(tmp_path):
+    path = tmp_path / "corpus.jsonl"
+    _interrupted_crawl(path, [{"url": "old"}])
+    legacy = tmp_path / "corpus.json"
+    legacy.write_text(json.dumps([{"url": "legacy"}]), encoding="utf-8")
+
+    assert list(iter_corpus(path)) == [{"url": "legacy"}]
+
+    with CorpusWriter(path) as writer:
+        writer.write({"url": "new"})
+    assert list(iter_corpus(path)) == [{"url": "new"}]